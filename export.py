@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Offline bulk export of artist, album or playlist metadata into deduplicated JSONL snapshots.
+
+Reuses the proxy's own request machinery (credential pool, upstream cache, the /artist/?f=
+aggregation) instead of going through HTTP. Progress is checkpointed per seed, so an
+interrupted run picks up where it stopped when started again with the same output directory.
+
+    python export.py artist 3637201 8812
+    python export.py playlist -f playlists.txt -o snapshot/ --concurrency 8 --parquet
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import HTTPException, Response
+
+import main
+
+# Upstream caps item pages at 100 whatever limit is asked for (see /album/)
+PLAYLIST_PAGE = 100
+ALBUM_PAGE = 500
+
+# Record kind -> (file name, dedupe key)
+SINKS = {
+    "artist": ("artists.jsonl", "id"),
+    "album": ("albums.jsonl", "id"),
+    "track": ("tracks.jsonl", "id"),
+    "playlist": ("playlists.jsonl", "uuid"),
+}
+
+
+class JsonlSink:
+    """Append-only JSONL writer that skips records whose key it has already written.
+
+    On open it rebuilds the seen set from the existing file and drops a trailing partial line
+    left by an interrupted run.
+    """
+
+    def __init__(self, path: Path, key: str):
+        self.path = path
+        self.key = key
+        self.seen = set()
+        self.written = 0
+        if path.exists():
+            self._recover()
+        self._fh = open(path, "ab")
+
+    def _recover(self) -> None:
+        data = self.path.read_bytes()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            with open(self.path, "r+b") as fh:
+                fh.truncate(complete)
+        for line in data[:complete].splitlines():
+            try:
+                self.seen.add(main._loads(line)[self.key])
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    def write(self, record: dict) -> bool:
+        value = record.get(self.key)
+        if value is None or value in self.seen:
+            return False
+        self.seen.add(value)
+        self._fh.write(main._dumps(record) + b"\n")
+        self.written += 1
+        return True
+
+    def sync(self) -> None:
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def close(self) -> None:
+        self.sync()
+        self._fh.close()
+
+
+class Checkpoint:
+    """Seeds that finished exporting, one per line; synced after every seed."""
+
+    def __init__(self, path: Path):
+        self.done = set(path.read_text().split()) if path.exists() else set()
+        self._fh = open(path, "a")
+
+    def mark(self, seed: str) -> None:
+        self.done.add(seed)
+        self._fh.write(f"{seed}\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+def _payload(result) -> dict:
+    # Aggregation routes return pre-rendered responses
+    if isinstance(result, Response):
+        return main._loads(result.body)
+    return result
+
+
+def _item_count(container: dict) -> int:
+    return (container.get("numberOfTracks") or 0) + (container.get("numberOfVideos") or 0)
+
+
+def _write_tracks(sinks: Dict[str, JsonlSink], entries: Iterable[dict]) -> List[int]:
+    track_ids = []
+    for entry in entries:
+        track = entry.get("item", entry)
+        if entry.get("type", "track") == "track" and track.get("id"):
+            sinks["track"].write(track)
+            track_ids.append(track["id"])
+    return track_ids
+
+
+async def crawl_artist(seed: str, sinks: Dict[str, JsonlSink]) -> None:
+    artist_id = int(seed)
+    detail, aggregate = await asyncio.gather(
+        main.get_artist(id=artist_id, f=None, skip_tracks=False),
+        main.get_artist(id=None, f=artist_id, skip_tracks=False),
+    )
+    albums = _payload(aggregate)["albums"]["items"]
+    for album in albums:
+        sinks["album"].write(album)
+    _write_tracks(sinks, _payload(aggregate)["tracks"])
+
+    artist = _payload(detail)["artist"]
+    artist["albumIds"] = [album["id"] for album in albums]
+    sinks["artist"].write(artist)
+
+
+async def crawl_album(seed: str, sinks: Dict[str, JsonlSink]) -> None:
+    album = None
+    track_ids: List[int] = []
+    offset = 0
+    while True:
+        # /album/ splits each request into upstream pages of 100 itself
+        page = _payload(await main.get_album(id=int(seed), limit=ALBUM_PAGE, offset=offset))["data"]
+        items = page.pop("items", [])
+        album = album or page
+        track_ids.extend(_write_tracks(sinks, items))
+        offset += ALBUM_PAGE
+        if not items or offset >= _item_count(album):
+            break
+    album["trackIds"] = track_ids
+    sinks["album"].write(album)
+
+
+async def crawl_playlist(seed: str, sinks: Dict[str, JsonlSink]) -> None:
+    playlist = None
+    track_ids: List[int] = []
+    offset = 0
+    while True:
+        page = _payload(await main.get_playlist(id=seed, limit=PLAYLIST_PAGE, offset=offset))
+        playlist = page["playlist"]
+        track_ids.extend(_write_tracks(sinks, page["items"]))
+        offset += PLAYLIST_PAGE
+        if not page["items"] or offset >= _item_count(playlist):
+            break
+    playlist["trackIds"] = track_ids
+    sinks["playlist"].write(playlist)
+
+
+CRAWLERS = {
+    "artist": crawl_artist,
+    "album": crawl_album,
+    "playlist": crawl_playlist,
+}
+
+
+def read_seeds(ids: List[str], seed_file: Optional[str]) -> List[str]:
+    seeds = list(ids)
+    if seed_file:
+        lines = sys.stdin if seed_file == "-" else open(seed_file)
+        with lines:
+            seeds.extend(line.split("#", 1)[0].strip() for line in lines)
+    # Keep first-seen order while dropping blanks and duplicates
+    return list(dict.fromkeys(seed for seed in seeds if seed))
+
+
+def write_parquet(out_dir: Path) -> None:
+    try:
+        from pyarrow import json as pa_json, parquet as pq
+    except ImportError:
+        print("pyarrow is not installed; skipping Parquet output", file=sys.stderr)
+        return
+    for name, _ in SINKS.values():
+        path = out_dir / name
+        if not path.exists() or path.stat().st_size == 0:
+            continue
+        try:
+            pq.write_table(pa_json.read_json(path), path.with_suffix(".parquet"))
+        except Exception as e:
+            print(f"Parquet conversion failed for {name}: {e}", file=sys.stderr)
+
+
+async def run(args) -> int:
+    seeds = read_seeds(args.ids, args.seed_file)
+    if not seeds:
+        print("No seeds given", file=sys.stderr)
+        return 2
+
+    out_dir = Path(args.output)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint = Checkpoint(out_dir / f"{args.kind}.checkpoint")
+    todo = [seed for seed in seeds if seed not in checkpoint.done]
+    sinks = {kind: JsonlSink(out_dir / name, key) for kind, (name, key) in SINKS.items()}
+
+    # Same per-client budget as the live proxy unless overridden
+    rate = args.rate if args.rate is not None else main.CLIENT_RATE
+    bucket = main._TokenBucket(rate, max(1.0, main.CLIENT_BURST)) if rate > 0 else None
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for seed in todo:
+        queue.put_nowait(seed)
+
+    if args.country:
+        main._country_ctx.set(args.country.upper())
+
+    crawl = CRAWLERS[args.kind]
+    failed: List[str] = []
+    started = time.monotonic()
+    print(f"{len(todo)} of {len(seeds)} {args.kind} seeds to export ({len(seeds) - len(todo)} already done)")
+
+    async def worker():
+        while True:
+            try:
+                seed = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            while bucket is not None and not bucket.try_acquire():
+                await asyncio.sleep(bucket.retry_after())
+            try:
+                await crawl(seed, sinks)
+            except (HTTPException, ValueError, KeyError) as e:
+                failed.append(seed)
+                print(f"{args.kind} {seed} failed: {getattr(e, 'detail', e)}", file=sys.stderr)
+                continue
+            for sink in sinks.values():
+                sink.sync()
+            checkpoint.mark(seed)
+            done = len(todo) - queue.qsize()
+            print(f"[{done}/{len(todo)}] {args.kind} {seed} ({sinks['track'].written} new tracks)")
+
+    try:
+        async with main.lifespan(main.app):
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    finally:
+        for sink in sinks.values():
+            sink.close()
+        checkpoint.close()
+
+    if args.parquet:
+        write_parquet(out_dir)
+
+    elapsed = time.monotonic() - started
+    summary = ", ".join(f"{sink.written} {kind}s" for kind, sink in sinks.items())
+    print(f"Exported {summary} in {elapsed:.1f}s; {len(failed)} seeds failed")
+    return 1 if failed else 0
+
+
+def main_cli() -> int:
+    parser = argparse.ArgumentParser(description="Bulk export Tidal metadata to JSONL snapshots.")
+    parser.add_argument("kind", choices=sorted(CRAWLERS), help="what the seed IDs refer to")
+    parser.add_argument("ids", nargs="*", help="seed IDs (playlist UUIDs for playlists)")
+    parser.add_argument("-f", "--seed-file", help="file with one seed ID per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="export", help="output directory (default: export)")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="seeds crawled at once (default: 4)")
+    parser.add_argument("--rate", type=float, help="seeds per second (default: CLIENT_RATE, 0 for unlimited)")
+    parser.add_argument("--country", help="two-letter region to export (default: COUNTRY_CODE)")
+    parser.add_argument("--parquet", action="store_true", help="also write Parquet files (needs pyarrow)")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
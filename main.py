@@ -1,26 +1,361 @@
 #!/usr/bin/env python3
 import asyncio
+import atexit
+import bisect
+import hashlib
+import hmac
+import heapq
+import importlib.util
+import itertools
 import json
+import math
 import os
+import queue
 import random
+import re
+import sqlite3
+import threading
 import time
+import uuid
+import zlib
+from collections import OrderedDict, deque
 from contextlib import asynccontextmanager
-from typing import Dict, List, Optional, Union
+from contextvars import ContextVar
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlencode, urlsplit
 
 import httpx
 import uvicorn
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.dependencies.utils import request_params_to_args
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.datastructures import QueryParams
 
 import logging
+import logging.handlers
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON decode/encode, falls back to stdlib json
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: brotli content-encoding
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: zstd content-encoding
+    zstandard = None
 
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-# Shared HTTP client is created in app lifespan for connection reuse
-_http_client: Optional[httpx.AsyncClient] = None
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Upstream bodies are truncated to this many bytes in log records
+LOG_BODY_LIMIT = int(os.getenv("LOG_BODY_LIMIT", "512"))
+# Records sharing a sample key: at most LOG_SAMPLE_BURST per LOG_SAMPLE_WINDOW seconds
+LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", "5"))
+LOG_SAMPLE_WINDOW = float(os.getenv("LOG_SAMPLE_WINDOW", "60"))
+
+# Correlates every log record of a request, including its fan-out sub-calls (tasks inherit it)
+_request_id_ctx: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+class _JsonLogFormatter(logging.Formatter):
+    _STANDARD = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "request_id"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        # Structured fields passed via extra=
+        for key, value in record.__dict__.items():
+            if key not in self._STANDARD and key != "sample_key":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _LogContextFilter(logging.Filter):
+    """Stamps the request id and rate-limits records that carry a `sample_key` extra."""
+
+    def __init__(self):
+        super().__init__()
+        self._windows: Dict[str, List[float]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id_ctx.get()
+        key = getattr(record, "sample_key", None)
+        if key is None:
+            return True
+
+        now = time.monotonic()
+        window = self._windows.get(key)
+        if window is None or now - window[0] >= LOG_SAMPLE_WINDOW:
+            suppressed = int(window[2]) if window else 0
+            if len(self._windows) > 10000:
+                self._windows.clear()
+            self._windows[key] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+        if window[1] < LOG_SAMPLE_BURST:
+            window[1] += 1
+            return True
+        window[2] += 1
+        return False
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the event loop: formatting and I/O happen on the listener thread, and
+    records are dropped (and counted) when the queue is full."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve args now (they may be mutated later) but leave traceback formatting to the listener
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _NonBlockingQueueHandler.dropped += 1
+
+
+def _configure_logging() -> None:
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    stream = logging.StreamHandler()
+    stream.setFormatter(
+        _JsonLogFormatter()
+        if LOG_FORMAT == "json"
+        else logging.Formatter("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s")
+    )
+    listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+
+    handler = _NonBlockingQueueHandler(log_queue)
+    handler.addFilter(_LogContextFilter())
+    logger.addHandler(handler)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+    listener.start()
+    atexit.register(listener.stop)
+
+
+_configure_logging()
+
+
+def _truncate_body(content: bytes) -> str:
+    text = content[:LOG_BODY_LIMIT].decode("utf-8", "replace")
+    return text + "..." if len(content) > LOG_BODY_LIMIT else text
+
+
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def _log_upstream_error(response: httpx.Response, url: str) -> None:
+    """Sampled, truncated log record for an upstream failure; identical errors share a sample key."""
+    status = response.status_code
+    logger.error(
+        "Upstream API error %s %s",
+        status,
+        url,
+        extra={
+            "sample_key": f"upstream:{status}:{_NUMERIC_SEGMENT.sub('/{id}', url)}",
+            "status": status,
+            "url": url,
+            "body": _truncate_body(response.content),
+        },
+    )
+
+# Upstream connection pools: name -> (host, path fragment or None, max connections, pool timeout).
+# Checked in order, so the playbackinfo lane is matched before the general tidal.com pool.
+# Each pool's size can be overridden with POOL_<NAME>_MAX_CONNECTIONS.
+UPSTREAM_POOLS = {
+    "auth": ("auth.tidal.com", None, 8, 5.0),
+    "playback": ("tidal.com", "/playbackinfo", 60, 8.0),
+    "api": ("api.tidal.com", None, 200, 12.0),
+    "openapi": ("openapi.tidal.com", None, 60, 12.0),
+    "web": ("tidal.com", None, 40, 12.0),
+    "default": (None, None, 20, 12.0),
+}
+
+
+class _PoolStats:
+    """Counters for one pool. Acquire time runs from sending the request until its headers go on
+    the wire, so it covers both waiting for a free connection and opening a new one."""
+
+    def __init__(self):
+        self.inflight = 0
+        self.peak_inflight = 0
+        self.h2_streams = 0
+        self.requests = 0
+        self.errors = 0
+        self.connects = 0
+        self.acquire_total = 0.0
+        self.acquire_max = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "inflight": self.inflight,
+            "peakInflight": self.peak_inflight,
+            "h2Streams": self.h2_streams,
+            "requests": self.requests,
+            "errors": self.errors,
+            "connects": self.connects,
+            "acquireAvgMs": round(self.acquire_total / self.requests * 1000, 2) if self.requests else 0.0,
+            "acquireMaxMs": round(self.acquire_max * 1000, 2),
+        }
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body wrapper that ends the request's accounting once the body is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, done):
+        self._stream = stream
+        self._done = done
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._done()
+
+
+class _InstrumentedTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncHTTPTransport, stats: _PoolStats, max_connections: int):
+        self._transport = transport
+        self.stats = stats
+        self.max_connections = max_connections
+
+    def connections(self) -> Tuple[int, int]:
+        """(open, idle) connections in the underlying httpcore pool."""
+        conns = list(getattr(getattr(self._transport, "_pool", None), "connections", []))
+        return len(conns), sum(1 for conn in conns if conn.is_idle())
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self.stats
+        started = time.monotonic()
+        state = {"acquired": False, "h2": False, "open": True}
+
+        async def trace(event: str, info: dict) -> None:
+            if event.endswith("connect_tcp.started"):
+                stats.connects += 1
+            elif event.endswith("send_request_headers.started") and not state["acquired"]:
+                state["acquired"] = True
+                waited = time.monotonic() - started
+                stats.acquire_total += waited
+                stats.acquire_max = max(stats.acquire_max, waited)
+                if event.startswith("http2."):
+                    state["h2"] = True
+                    stats.h2_streams += 1
+
+        def done() -> None:
+            if state["open"]:
+                state["open"] = False
+                stats.inflight -= 1
+                if state["h2"]:
+                    stats.h2_streams -= 1
+
+        request.extensions["trace"] = trace
+        stats.requests += 1
+        stats.inflight += 1
+        stats.peak_inflight = max(stats.peak_inflight, stats.inflight)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            stats.errors += 1
+            done()
+            raise
+        response.stream = _TrackedStream(response.stream, done)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class _ClientRegistry:
+    """One AsyncClient per upstream pool so a burst against one host (or purpose) can't starve
+    another; token refreshes in particular always have their own connections."""
+
+    def __init__(self, pools: Dict[str, tuple]):
+        self._routes = [(name, host, path) for name, (host, path, _, _) in pools.items() if host]
+        self._pools = pools
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, _InstrumentedTransport] = {}
+
+    def start(self) -> None:
+        for name, (_, _, max_connections, pool_timeout) in self._pools.items():
+            max_connections = int(os.getenv(f"POOL_{name.upper()}_MAX_CONNECTIONS", max_connections))
+            transport = _InstrumentedTransport(
+                httpx.AsyncHTTPTransport(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_keepalive_connections=max_connections,
+                        max_connections=max_connections,
+                        keepalive_expiry=30.0,
+                    ),
+                ),
+                _PoolStats(),
+                max_connections,
+            )
+            self._transports[name] = transport
+            self._clients[name] = httpx.AsyncClient(
+                transport=transport,
+                timeout=httpx.Timeout(connect=3.0, read=12.0, write=8.0, pool=pool_timeout),
+            )
+
+    async def stop(self) -> None:
+        clients, self._clients = self._clients, {}
+        await asyncio.gather(*(client.aclose() for client in clients.values()), return_exceptions=True)
+
+    def pool_for(self, url: str) -> str:
+        parts = urlsplit(url)
+        for name, host, path in self._routes:
+            if parts.hostname == host and (path is None or path in parts.path):
+                return name
+        return "default"
+
+    def client(self, url: str) -> Optional[httpx.AsyncClient]:
+        return self._clients.get(self.pool_for(url))
+
+    def snapshot(self) -> dict:
+        pools = {}
+        for name, transport in self._transports.items():
+            open_conns, idle_conns = transport.connections() if name in self._clients else (0, 0)
+            pools[name] = {
+                "maxConnections": transport.max_connections,
+                "connections": open_conns,
+                "idleConnections": idle_conns,
+                **transport.stats.snapshot(),
+            }
+        return pools
+
+
+_upstream_pools = _ClientRegistry(UPSTREAM_POOLS)
 
 # One lock per credential to avoid global contention during token refreshes
 _refresh_locks: Dict[str, asyncio.Lock] = {}
@@ -28,24 +363,134 @@ _refresh_locks: Dict[str, asyncio.Lock] = {}
 # Loaded credential set from token.json; each entry will be enriched with access cache
 _creds: List[dict] = []
 
+# Credential pinned for the current request's fan-out (e.g. every sub-request of a /batch)
+_pinned_cred: ContextVar[Optional[dict]] = ContextVar("pinned_cred", default=None)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global _http_client
-    _http_client = httpx.AsyncClient(
-        http2=True,
-        timeout=httpx.Timeout(connect=3.0, read=12.0, write=8.0, pool=12.0),
-        limits=httpx.Limits(
-            max_keepalive_connections=200,
-            max_connections=300,
-            keepalive_expiry=30.0,
-        ),
-    )
+    _upstream_pools.start()
+    _entity_store.start()
+    _cluster.start()
+    learn_countries = asyncio.create_task(_learn_credential_countries())
     try:
         yield
     finally:
-        if _http_client:
-            await _http_client.aclose()
+        learn_countries.cancel()
+        await _cluster.stop()
+        await _entity_store.stop()
+        await _upstream_pools.stop()
+
+# Named projections for ?fields=; presets may be mixed with dotted paths
+FIELD_PRESETS: Dict[str, str] = {
+    "minimal": "id,title,name,duration",
+    "player": (
+        "id,title,version,duration,explicit,audioQuality,trackNumber,"
+        "album.id,album.title,album.cover,artists[].id,artists[].name"
+    ),
+}
+
+# Keys holding child entity lists; kept on projected entities so the projection reaches the children
+_PROJECTION_CONTAINERS = ("items",)
+# Keys identifying a Tidal object; playback info and lyrics carry trackId instead of id
+_ENTITY_ID_KEYS = ("id", "trackId")
+# Envelopes built by our own routes rather than taken from Tidal; passed through unprojected
+_PROJECTION_OPAQUE = ("covers",)
+
+# Compiled projection for the current request, set by the field_projection middleware
+_fields_ctx: ContextVar[Optional[dict]] = ContextVar("fields", default=None)
+
+# Region for the current request (?countryCode=); empty means COUNTRY_CODE
+_country_ctx: ContextVar[str] = ContextVar("country", default="")
+_COUNTRY_PATTERN = re.compile(r"^[A-Za-z]{2}$")
+
+
+@lru_cache(maxsize=256)
+def _compile_fields(spec: str) -> dict:
+    """Compile "id,album.cover,artists[].name" into a nested tree; True marks a kept leaf."""
+    tree: dict = {}
+    for raw in spec.split(","):
+        path = raw.strip()
+        if not path:
+            continue
+        if path in FIELD_PRESETS:
+            _merge_field_trees(tree, _compile_fields(FIELD_PRESETS[path]))
+            continue
+        parts = path.replace("[]", "").split(".")
+        node = tree
+        for part in parts[:-1]:
+            child = node.setdefault(part, {})
+            if child is True:
+                break
+            node = child
+        else:
+            node[parts[-1]] = True
+    return tree
+
+
+def _merge_field_trees(into: dict, other: dict) -> None:
+    for key, sub in other.items():
+        if sub is True or into.get(key) is True:
+            into[key] = True
+        else:
+            _merge_field_trees(into.setdefault(key, {}), sub)
+
+
+def _select(value, tree: dict):
+    if isinstance(value, list):
+        return [_select(v, tree) for v in value]
+    if isinstance(value, dict):
+        return {k: (value[k] if sub is True else _select(value[k], sub)) for k, sub in tree.items() if k in value}
+    return value
+
+
+def _project(value, tree: dict):
+    """Apply a compiled projection to every Tidal entity found under response envelopes.
+
+    The entity's id (or trackId) is always kept so projected objects stay identifiable.
+    """
+    if isinstance(value, list):
+        return [_project(v, tree) for v in value]
+    if not isinstance(value, dict):
+        return value
+    id_key = next((key for key in _ENTITY_ID_KEYS if key in value), None)
+    if id_key is None:
+        return {k: (v if k in _PROJECTION_OPAQUE else _project(v, tree)) for k, v in value.items()}
+
+    out = {id_key: value[id_key]}
+    out.update((k, value[k] if sub is True else _select(value[k], sub)) for k, sub in tree.items() if k in value)
+    for key in _PROJECTION_CONTAINERS:
+        if key in value and key not in out:
+            out[key] = _project(value[key], tree)
+    return out
+
+
+def _loads(data: bytes):
+    """Decode upstream JSON straight from the raw response bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class ProjectedJSONResponse(JSONResponse):
+    """JSON response that applies the request's ?fields= projection before serializing.
+
+    Aggregation routes return this directly: their payloads are already plain upstream JSON,
+    so skipping FastAPI's jsonable_encoder walk saves a full pass over thousands of items.
+    """
+
+    def render(self, content) -> bytes:
+        tree = _fields_ctx.get()
+        if tree:
+            content = _project(content, tree)
+        return _dumps(content)
+
 
 API_VERSION = "2.4"
 
@@ -54,6 +499,7 @@ app = FastAPI(
     version=API_VERSION,
     description="Tidal Music Proxy",
     lifespan=lifespan,
+    default_response_class=ProjectedJSONResponse,
 )
 
 app.add_middleware(
@@ -65,6 +511,483 @@ app.add_middleware(
 )
 
 
+# Cache-Control policy per route so CDNs and browsers can absorb metadata traffic.
+# Playback info carries short-lived signed manifest URLs, so it stays private and brief.
+CACHE_CONTROL_POLICIES: Dict[str, str] = {
+    "/": "public, max-age=300",
+    "/info/": "public, max-age=3600, stale-while-revalidate=600",
+    "/track/": "private, max-age=60",
+    "/recommendations/": "public, max-age=600",
+    "/search/": "public, max-age=300",
+    "/album/": "public, max-age=86400, stale-while-revalidate=3600",
+    "/album/similar/": "public, max-age=86400, stale-while-revalidate=3600",
+    "/artist/": "public, max-age=3600, stale-while-revalidate=600",
+    "/artist/similar/": "public, max-age=86400, stale-while-revalidate=3600",
+    "/mix/": "public, max-age=600",
+    "/playlist/": "public, max-age=300",
+    "/cover/": "public, max-age=86400, stale-while-revalidate=3600",
+    "/lyrics/": "public, max-age=604800, stale-while-revalidate=86400",
+}
+
+
+def _etag_for(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our strong ETag."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        # Compressed representations carry an encoding suffix on the same validator
+        for encoding in _ENCODERS:
+            suffix = f'-{encoding}"'
+            if candidate.endswith(suffix):
+                candidate = candidate[: -len(suffix)] + '"'
+                break
+        if candidate == etag:
+            return True
+    return False
+
+
+@app.middleware("http")
+async def cache_headers(request: Request, call_next):
+    """Attach Cache-Control + strong ETags to JSON responses and answer conditional GETs with 304."""
+    response = await call_next(request)
+
+    policy = CACHE_CONTROL_POLICIES.get(request.url.path)
+    if request.method not in ("GET", "HEAD") or policy is None:
+        return response
+
+    if response.status_code != 200:
+        response.headers.setdefault("cache-control", "no-store")
+        return response
+
+    if not response.headers.get("content-type", "").startswith("application/json"):
+        response.headers.setdefault("cache-control", policy)
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    etag = _etag_for(body)
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"etag": etag, "cache-control": policy})
+
+    headers = dict(response.headers)
+    headers["etag"] = etag
+    headers["cache-control"] = policy
+    return Response(content=body, status_code=response.status_code, headers=headers)
+
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Bodies above this size are compressed in a worker thread so the event loop keeps serving
+COMPRESSION_OFFLOAD_SIZE = int(os.getenv("COMPRESSION_OFFLOAD_SIZE", str(256 * 1024)))
+
+_COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+# Levels per encoding; aggregation routes trade ratio for CPU, cacheable routes compress harder
+_DEFAULT_COMPRESSION_LEVELS = {"zstd": 3, "br": 5, "gzip": 6}
+COMPRESSION_LEVELS: Dict[str, Dict[str, int]] = {
+    "/artist/": {"zstd": 3, "br": 4, "gzip": 5},
+    "/album/": {"zstd": 6, "br": 6, "gzip": 6},
+    "/playlist/": {"zstd": 3, "br": 4, "gzip": 5},
+    "/lyrics/": {"zstd": 9, "br": 9, "gzip": 9},
+}
+
+
+class _StreamCompressor:
+    """Incremental compressor that flushes after every chunk so streamed records arrive promptly."""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=level)
+        else:
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "zstd":
+            return self._obj.compress(chunk) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == "br":
+            return self._obj.process(chunk) + self._obj.flush()
+        return self._obj.compress(chunk) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "zstd":
+            return self._obj.flush()
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+def _compress_body(encoding: str, level: int, body: bytes) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return zlib.compress(body, level, wbits=31)
+
+
+# Server preference order; only encodings whose library is importable are offered
+_ENCODERS = tuple(
+    name
+    for name, available in (("zstd", zstandard is not None), ("br", brotli is not None), ("gzip", True))
+    if available
+)
+
+
+def _negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick our most preferred encoding that the client accepts with a non-zero q-value."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    wildcard = accepted.get("*", 0.0)
+    for encoding in _ENCODERS:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+@app.middleware("http")
+async def compress_responses(request: Request, call_next):
+    """Content-negotiated zstd/brotli/gzip for buffered JSON and streamed NDJSON responses."""
+    response = await call_next(request)
+
+    if response.status_code == 304 and (etag := response.headers.get("etag")):
+        # Echo the validator of the representation the client holds: the encoded one when it
+        # sent the suffixed tag for the encoding it would be served now
+        response.headers["vary"] = "Accept-Encoding"
+        encoding = _negotiate_encoding(request.headers.get("accept-encoding", ""))
+        encoded_etag = f'{etag[:-1]}-{encoding}"'
+        if encoding is not None and encoded_etag in request.headers.get("if-none-match", ""):
+            response.headers["etag"] = encoded_etag
+        return response
+
+    content_type = response.headers.get("content-type", "")
+    if (
+        request.method == "HEAD"
+        or response.status_code in (204, 304)
+        or "content-encoding" in response.headers
+        or not content_type.startswith(_COMPRESSIBLE_TYPES)
+    ):
+        return response
+
+    response.headers["vary"] = "Accept-Encoding"
+    encoding = _negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is None:
+        return response
+
+    level = COMPRESSION_LEVELS.get(request.url.path, _DEFAULT_COMPRESSION_LEVELS)[encoding]
+    headers = dict(response.headers)
+    headers["content-encoding"] = encoding
+    if etag := headers.get("etag"):
+        headers["etag"] = f'{etag[:-1]}-{encoding}"'
+
+    content_length = headers.pop("content-length", None)
+    if content_length is None:
+        compressor = _StreamCompressor(encoding, level)
+
+        async def stream():
+            async for chunk in response.body_iterator:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                if len(chunk) >= COMPRESSION_OFFLOAD_SIZE:
+                    out = await asyncio.to_thread(compressor.compress, chunk)
+                else:
+                    out = compressor.compress(chunk)
+                if out:
+                    yield out
+            yield compressor.finish()
+
+        return StreamingResponse(stream(), status_code=response.status_code, headers=headers)
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return Response(content=body, status_code=response.status_code, headers=dict(response.headers))
+
+    if len(body) >= COMPRESSION_OFFLOAD_SIZE:
+        compressed = await asyncio.to_thread(_compress_body, encoding, level, body)
+    else:
+        compressed = _compress_body(encoding, level, body)
+
+    return Response(content=compressed, status_code=response.status_code, headers=headers)
+
+
+@app.middleware("http")
+async def field_projection(request: Request, call_next):
+    """Expose ?fields= to the response class; supported uniformly by every route."""
+    fields = request.query_params.get("fields")
+    if not fields:
+        return await call_next(request)
+
+    token = _fields_ctx.set(_compile_fields(fields))
+    try:
+        return await call_next(request)
+    finally:
+        _fields_ctx.reset(token)
+
+
+@app.middleware("http")
+async def country_context(request: Request, call_next):
+    """Expose ?countryCode= to every route, overriding COUNTRY_CODE for this request."""
+    country = request.query_params.get("countryCode")
+    if not country:
+        return await call_next(request)
+    if not _COUNTRY_PATTERN.match(country):
+        return JSONResponse({"detail": "countryCode must be a two-letter ISO country code"}, status_code=422)
+
+    token = _country_ctx.set(country.upper())
+    try:
+        return await call_next(request)
+    finally:
+        _country_ctx.reset(token)
+
+
+class _TokenBucket:
+    """Token bucket; rate is tokens per second, burst the bucket capacity."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, amount: float = 1.0) -> bool:
+        self._refill()
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def retry_after(self, amount: float = 1.0) -> float:
+        """Seconds until `amount` tokens are available."""
+        self._refill()
+        if self.tokens >= amount or self.rate <= 0:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+
+# Admission control. ADMISSION_MAX_INFLIGHT=0 disables queuing/shedding entirely
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", "256"))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "1024"))
+# Latency target: requests expected to queue longer than this are shed immediately with 503
+ADMISSION_QUEUE_TARGET = float(os.getenv("ADMISSION_QUEUE_TARGET", "2.0"))
+# Per-client token bucket (requests/second, burst); CLIENT_RATE=0 disables
+CLIENT_RATE = float(os.getenv("CLIENT_RATE", "0"))
+CLIENT_BURST = float(os.getenv("CLIENT_BURST", "40"))
+CLIENT_BUCKETS_MAX = int(os.getenv("CLIENT_BUCKETS_MAX", "100000"))
+# Key clients by the first X-Forwarded-For hop (only behind a trusted reverse proxy)
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "").lower() in ("1", "true", "yes")
+# Comma-separated keys that get their own bucket via X-API-Key; any other value is ignored
+API_KEYS = frozenset(key.strip() for key in os.getenv("API_KEYS", "").split(",") if key.strip())
+
+# Queue priority per route; lower is served first. Playback must not wait behind aggregation
+ROUTE_PRIORITIES: Dict[str, int] = {
+    "/track/": 0,
+    "/info/": 1,
+    "/lyrics/": 1,
+    "/cover/": 1,
+    "/artist/": 3,
+    "/radio/": 3,
+    # A batch may wrap any route, including /artist/?f= aggregations, so it queues with the lowest
+    "/batch": 3,
+}
+_DEFAULT_ROUTE_PRIORITY = 2
+
+# Client identity for the current request, set by the admission middleware
+_client_ctx: ContextVar[str] = ContextVar("client", default="")
+
+
+def _client_key(request: Request) -> str:
+    # Unknown keys fall through to the IP, so rotating the header can't mint fresh buckets
+    if (api_key := request.headers.get("x-api-key")) and api_key in API_KEYS:
+        return f"key:{hashlib.blake2b(api_key.encode(), digest_size=8).hexdigest()}"
+    if TRUST_FORWARDED_FOR and (forwarded := request.headers.get("x-forwarded-for")):
+        return f"ip:{forwarded.split(',')[0].strip()}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def _route_priority(request: Request) -> int:
+    path = request.url.path
+    if path == "/artist/" and "f" not in request.query_params:
+        return _DEFAULT_ROUTE_PRIORITY
+    return ROUTE_PRIORITIES.get(path, _DEFAULT_ROUTE_PRIORITY)
+
+
+class _Shed(Exception):
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+
+
+class _AdmissionController:
+    """Bounded priority queue in front of the routes with per-client fairness.
+
+    Waiters are ordered by (priority, client's queued count, arrival), so within a priority
+    each client's n-th queued request goes after every other client's earlier ones.
+    """
+
+    def __init__(self, max_inflight: int, queue_size: int, queue_target: float):
+        self.max_inflight = max_inflight
+        self.queue_size = queue_size
+        self.queue_target = queue_target
+        self.inflight = 0
+        # EWMA of time a request holds a slot, used to predict queue wait
+        self.service_time = 0.1
+        self._waiters: List[Tuple[int, int, int, str, asyncio.Future]] = []
+        self._queued_per_client: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._buckets: "OrderedDict[str, _TokenBucket]" = OrderedDict()
+
+    def check_rate(self, client: str) -> None:
+        """Spend one token from the client's bucket or raise _Shed with its refill time."""
+        if CLIENT_RATE <= 0:
+            return
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = _TokenBucket(CLIENT_RATE, CLIENT_BURST)
+            while len(self._buckets) > CLIENT_BUCKETS_MAX:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(client)
+        if not bucket.try_acquire():
+            raise _Shed(bucket.retry_after())
+
+    def expected_wait(self, priority: int) -> float:
+        ahead = sum(1 for waiter in self._waiters if waiter[0] <= priority and not waiter[4].done())
+        return (ahead + 1) * self.service_time / self.max_inflight
+
+    async def acquire(self, client: str, priority: int) -> None:
+        # Slots are handed directly to live waiters on release, so a free slot means none are queued
+        if self.inflight < self.max_inflight:
+            self.inflight += 1
+            return
+
+        expected = self.expected_wait(priority)
+        if len(self._waiters) >= self.queue_size or expected > self.queue_target:
+            raise _Shed(max(expected, 1.0))
+
+        queued = self._queued_per_client.get(client, 0)
+        self._queued_per_client[client] = queued + 1
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, queued, next(self._seq), client, fut))
+        try:
+            await asyncio.wait_for(fut, self.queue_target)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if fut.done() and not fut.cancelled():
+                # A slot was handed over as we gave up; pass it on
+                self.release()
+            if isinstance(e, asyncio.TimeoutError):
+                raise _Shed(self.queue_target)
+            raise
+        finally:
+            remaining = self._queued_per_client.get(client, 1) - 1
+            if remaining > 0:
+                self._queued_per_client[client] = remaining
+            else:
+                self._queued_per_client.pop(client, None)
+
+    def release(self, held_for: Optional[float] = None) -> None:
+        if held_for is not None:
+            self.service_time = 0.9 * self.service_time + 0.1 * held_for
+        while self._waiters:
+            fut = heapq.heappop(self._waiters)[4]
+            if not fut.done():
+                # Hand the slot straight to the next waiter; inflight stays unchanged
+                fut.set_result(None)
+                return
+        self.inflight -= 1
+
+
+_admission = _AdmissionController(ADMISSION_MAX_INFLIGHT, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TARGET)
+
+
+def _shed_response(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"retry-after": str(max(1, math.ceil(retry_after))), "cache-control": "no-store"},
+    )
+
+
+class _ReleaseAfterResponse:
+    """ASGI wrapper that holds the admission slot until the response has been sent.
+
+    Streamed routes keep working after headers go out, so the slot can't be freed when the
+    route returns. Releasing in a finally around the send also frees it when the client
+    disconnects before the body is read.
+    """
+
+    def __init__(self, response: Response, started: float):
+        self.response = response
+        self.started = started
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.response(scope, receive, send)
+        finally:
+            _admission.release(time.monotonic() - self.started)
+
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    """Rate-limit per client, queue by route priority and shed early when the queue is too slow."""
+    client = _client_key(request)
+    _client_ctx.set(client)
+
+    try:
+        _admission.check_rate(client)
+    except _Shed as e:
+        return _shed_response(429, "Client rate limit exceeded", e.retry_after)
+
+    if _admission.max_inflight <= 0:
+        return await call_next(request)
+
+    try:
+        await _admission.acquire(client, _route_priority(request))
+    except _Shed as e:
+        return _shed_response(503, "Server overloaded, retry later", e.retry_after)
+
+    started = time.monotonic()
+    try:
+        response = await call_next(request)
+    except BaseException:
+        _admission.release(time.monotonic() - started)
+        raise
+    return _ReleaseAfterResponse(response, started)
+
+
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    """Assign a request id (honouring X-Request-ID) for log correlation and echo it back."""
+    request_id = request.headers.get("x-request-id", "")[:64] or uuid.uuid4().hex[:16]
+    _request_id_ctx.set(request_id)
+    response = await call_next(request)
+    response.headers["x-request-id"] = request_id
+    return response
+
+
 # Config (defaults act as fallback if token file missing)
 CLIENT_ID = os.getenv("CLIENT_ID", "zU4XHVVkc2tDPo4t")
 CLIENT_SECRET = os.getenv("CLIENT_SECRET", "VJKhDFqJPqvsPVNBV6ukXTJmwlvbttP7wlMlrc72se4=")
@@ -72,6 +995,8 @@ REFRESH_TOKEN: Optional[str] = os.getenv("REFRESH_TOKEN")
 USER_ID = os.getenv("USER_ID")
 TOKEN_FILE = os.getenv("TOKEN_FILE", "token.json")
 COUNTRY_CODE = os.getenv("COUNTRY_CODE", "US")
+TOKEN_URL = "https://auth.tidal.com/v1/oauth2/token"
+SESSIONS_URL = "https://api.tidal.com/v1/sessions"
 
 if os.path.exists(TOKEN_FILE):
     with open(TOKEN_FILE, "r") as tok:
@@ -85,6 +1010,8 @@ if os.path.exists(TOKEN_FILE):
                 "client_secret": entry.get("client_secret") or CLIENT_SECRET,
                 "refresh_token": entry.get("refresh_token") or REFRESH_TOKEN,
                 "user_id": entry.get("userID") or USER_ID,
+                # Account region; learned from the session on first refresh when absent
+                "country": (entry.get("countryCode") or "").upper() or None,
                 # Access tokens in file have unknown expiry; force refresh on first use
                 "access_token": None,
                 "expires_at": 0,
@@ -99,6 +1026,7 @@ if REFRESH_TOKEN:
         "client_secret": CLIENT_SECRET,
         "refresh_token": REFRESH_TOKEN,
         "user_id": USER_ID,
+        "country": None,
         "access_token": None,
         "expires_at": 0,
     }
@@ -112,10 +1040,71 @@ if _creds:
     REFRESH_TOKEN = _creds[0]["refresh_token"]
 
 
-def _pick_credential() -> dict:
+def _country() -> str:
+    return _country_ctx.get() or COUNTRY_CODE
+
+
+def _pick_credential(country: Optional[str] = None) -> dict:
+    """Random credential whose account region matches the request's country.
+
+    Accounts with a region not yet known come next; any credential is the last resort.
+    """
+    country = country or _country()
+    pinned = _pinned_cred.get()
+    if pinned is not None and pinned["country"] in (None, country):
+        return pinned
     if not _creds:
         raise HTTPException(status_code=500, detail="No Tidal credentials available; populate token.json")
-    return random.choice(_creds)
+    candidates = (
+        [c for c in _creds if c["country"] == country]
+        or [c for c in _creds if c["country"] is None]
+        or _creds
+    )
+    return random.choice(candidates)
+
+
+async def _learn_credential_country(cred: dict) -> None:
+    """Tag a credential with its account region from the session behind its access token."""
+    try:
+        client = await get_http_client(SESSIONS_URL)
+        res = await client.get(SESSIONS_URL, headers={"authorization": f"Bearer {cred['access_token']}"})
+        res.raise_for_status()
+        country = res.json().get("countryCode")
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning("Could not read session region for client %s: %s", cred["client_id"], e)
+        return
+    if country:
+        cred["country"] = country.upper()
+
+
+# Region lookups in flight, keyed by refresh token (also keeps the tasks referenced)
+_country_tasks: Dict[str, asyncio.Task] = {}
+
+
+def _learn_country_later(cred: dict) -> asyncio.Task:
+    """Look up a credential's region in the background, off the refresh lock and its auth lane."""
+    key = cred["refresh_token"]
+    if (task := _country_tasks.get(key)) is None:
+        task = _country_tasks[key] = asyncio.create_task(_learn_credential_country(cred))
+        task.add_done_callback(lambda _: _country_tasks.pop(key, None))
+    return task
+
+
+async def _learn_credential_countries() -> None:
+    """Refresh credentials without a known region at startup so routing can use them right away."""
+    sem = asyncio.Semaphore(4)
+
+    async def learn(cred: dict) -> None:
+        async with sem:
+            await get_tidal_token_for_cred(cred=cred)
+            if cred["country"] is None:
+                await _learn_country_later(cred)
+
+    unknown = [cred for cred in _creds if cred["country"] is None]
+    await asyncio.gather(*(learn(cred) for cred in unknown), return_exceptions=True)
+    if unknown:
+        regions = sorted({cred["country"] or "unknown" for cred in _creds})
+        logger.info("Credential regions: %s", ", ".join(regions))
 
 
 def _lock_for_cred(cred: dict) -> asyncio.Lock:
@@ -127,11 +1116,12 @@ def _lock_for_cred(cred: dict) -> asyncio.Lock:
     return lock
 
 
-async def get_http_client() -> httpx.AsyncClient:
-    if _http_client is None:
+async def get_http_client(url: str) -> httpx.AsyncClient:
+    client = _upstream_pools.client(url)
+    if client is None:
         # Fallback for contexts where lifespan is not run (e.g., direct calls)
         return httpx.AsyncClient(http2=True)
-    return _http_client
+    return client
 
 
 async def refresh_tidal_token(cred: Optional[dict] = None):
@@ -142,10 +1132,16 @@ async def refresh_tidal_token(cred: Optional[dict] = None):
         if cred["access_token"] and time.time() < cred["expires_at"]:
             return cred["access_token"]
 
+        # In cluster mode one node owns each credential's refreshes; others borrow its token
+        if await _cluster.borrow_token(cred):
+            if cred["country"] is None:
+                _learn_country_later(cred)
+            return cred["access_token"]
+
         try:
-            client = await get_http_client()
+            client = await get_http_client(TOKEN_URL)
             res = await client.post(
-                "https://auth.tidal.com/v1/oauth2/token",
+                TOKEN_URL,
                 data={
                     "client_id": cred["client_id"],
                     "refresh_token": cred["refresh_token"],
@@ -161,11 +1157,13 @@ async def refresh_tidal_token(cred: Optional[dict] = None):
 
             cred["access_token"] = new_token
             cred["expires_at"] = time.time() + expires_in - 60
-
-            return new_token
         except httpx.HTTPError as e:
             raise HTTPException(status_code=401, detail=f"Token refresh failed: {str(e)}")
 
+        if cred["country"] is None:
+            _learn_country_later(cred)
+        return new_token
+
 
 async def get_tidal_token(force_refresh: bool = False):
     return await get_tidal_token_for_cred(force_refresh=force_refresh)
@@ -182,34 +1180,566 @@ async def get_tidal_token_for_cred(force_refresh: bool = False, cred: Optional[d
     return token, cred
 
 
-async def make_request(url: str, token: Optional[str] = None, params: Optional[dict] = None, cred: Optional[dict] = None):
+# Persistent entity store (SQLite, WAL). Unset ENTITY_STORE_PATH disables it
+ENTITY_STORE_PATH = os.getenv("ENTITY_STORE_PATH")
+ENTITY_STORE_TTL = float(os.getenv("ENTITY_STORE_TTL", "86400"))
+ENTITY_STORE_FLUSH_INTERVAL = float(os.getenv("ENTITY_STORE_FLUSH_INTERVAL", "2"))
+# Upstream bodies awaiting ingestion; oldest are dropped if the writer falls behind
+ENTITY_STORE_MAX_PENDING = int(os.getenv("ENTITY_STORE_MAX_PENDING", "2000"))
+
+
+def _entity_kind(obj: dict) -> Optional[str]:
+    """Classify full v1 entity objects; the partial album/artist stubs nested in tracks don't qualify."""
+    if "isrc" in obj and "duration" in obj and "album" in obj:
+        return "track"
+    if "numberOfTracks" in obj and "cover" in obj:
+        return "album"
+    if "artistTypes" in obj and "name" in obj:
+        return "artist"
+    return None
+
+
+def _iter_entities(value):
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            if isinstance(node.get("id"), int) and (kind := _entity_kind(node)):
+                yield kind, node
+            stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+
+
+class _EntityStore:
+    """Normalized on-disk store of tracks, albums and artists seen in any upstream response.
+
+    Ingestion only queues raw bodies on the event loop; decoding, walking and writes happen in a
+    worker thread on a periodic flush. Reads are point lookups, also off the loop.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._pending: deque = deque(maxlen=ENTITY_STORE_MAX_PENDING)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._conn is not None
+
+    def start(self) -> None:
+        if not self.path or self._conn is not None:
+            return
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entities ("
+            " kind TEXT NOT NULL, id INTEGER NOT NULL, country TEXT NOT NULL,"
+            " body BLOB NOT NULL, fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (kind, id, country)) WITHOUT ROWID"
+        )
+        self._conn = conn
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._conn is None:
+            return
+        if self._task:
+            self._task.cancel()
+        await self.flush()
+        with self._lock:
+            self._conn.close()
+        self._conn = None
+
+    def ingest(self, body: bytes, country: str) -> None:
+        if self._conn is not None:
+            self._pending.append((body, country))
+
+    async def flush(self) -> None:
+        if self._conn is None or not self._pending:
+            return
+        batch = list(self._pending)
+        self._pending.clear()
+        await asyncio.to_thread(self._write, batch)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(ENTITY_STORE_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Entity store flush failed")
+
+    def _write(self, batch: List[Tuple[bytes, str]]) -> None:
+        now = time.time()
+        rows = {}
+        for body, country in batch:
+            try:
+                payload = _loads(body)
+            except ValueError:
+                continue
+            for kind, obj in _iter_entities(payload):
+                rows[(kind, obj["id"], country)] = _dumps(obj)
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entities (kind, id, country, body, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                [(kind, entity_id, country, body, now) for (kind, entity_id, country), body in rows.items()],
+            )
+            self._conn.execute("COMMIT")
+
+    def _read(self, kind: str, entity_id: int, country: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM entities WHERE kind = ? AND id = ? AND country = ? AND fetched_at > ?",
+                (kind, entity_id, country, time.time() - ENTITY_STORE_TTL),
+            ).fetchone()
+        return row[0] if row else None
+
+    async def get(self, kind: str, entity_id: int, country: str) -> Optional[dict]:
+        """Return a fresh stored entity, or None to fall through to upstream."""
+        if self._conn is None:
+            return None
+        body = await asyncio.to_thread(self._read, kind, entity_id, country)
+        return _loads(body) if body is not None else None
+
+
+_entity_store = _EntityStore(ENTITY_STORE_PATH)
+
+
+# Upstream response cache. TTL 0 disables it; playback info expires quickly (signed URLs)
+UPSTREAM_CACHE_TTL = float(os.getenv("UPSTREAM_CACHE_TTL", "300"))
+PLAYBACK_CACHE_TTL = float(os.getenv("PLAYBACK_CACHE_TTL", "30"))
+UPSTREAM_CACHE_MAX_ENTRIES = int(os.getenv("UPSTREAM_CACHE_MAX_ENTRIES", "20000"))
+# Total body bytes held; large listing pages would otherwise let the entry cap reach GBs
+UPSTREAM_CACHE_MAX_BYTES = int(os.getenv("UPSTREAM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Expired entries are still served for this long while a background revalidation runs
+CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "60"))
+# Keys hit this often within one TTL are refreshed ahead of expiry
+CACHE_HOT_HITS = int(os.getenv("CACHE_HOT_HITS", "5"))
+# Refresh-ahead window as a fraction of the TTL
+CACHE_REFRESH_AHEAD = float(os.getenv("CACHE_REFRESH_AHEAD", "0.2"))
+# Background refresh budget (refreshes per second, burst) so revalidation can't crowd out users
+CACHE_REFRESH_RATE = float(os.getenv("CACHE_REFRESH_RATE", "5"))
+CACHE_REFRESH_BURST = int(os.getenv("CACHE_REFRESH_BURST", "20"))
+
+
+# Negative cache: exact short-TTL map of recent misses. A rotating Bloom filter spots keys that
+# keep missing, which are remembered for the longer NEGATIVE_CACHE_REPEAT_TTL
+NEGATIVE_CACHE_TTL = float(os.getenv("NEGATIVE_CACHE_TTL", "60"))
+NEGATIVE_CACHE_REPEAT_TTL = float(os.getenv("NEGATIVE_CACHE_REPEAT_TTL", "600"))
+NEGATIVE_CACHE_MAX_ENTRIES = int(os.getenv("NEGATIVE_CACHE_MAX_ENTRIES", "50000"))
+# 0 disables the Bloom filter; ~1.8 MB per generation at the defaults
+NEGATIVE_BLOOM_CAPACITY = int(os.getenv("NEGATIVE_BLOOM_CAPACITY", "1000000"))
+NEGATIVE_BLOOM_ERROR_RATE = float(os.getenv("NEGATIVE_BLOOM_ERROR_RATE", "0.001"))
+NEGATIVE_BLOOM_ROTATE = float(os.getenv("NEGATIVE_BLOOM_ROTATE", "3600"))
+
+# Tidal reports unknown IDs and IDs unavailable in the requested country as 404
+_NEGATIVE_STATUSES = frozenset({404, 451})
+
+
+class _RotatingBloomFilter:
+    """Two-generation Bloom filter. Adds go to the current generation; when it fills up or
+    ages past `rotate_after` it becomes the previous one, so false positives are transient."""
+
+    def __init__(self, capacity: int, error_rate: float, rotate_after: float):
+        self.capacity = capacity
+        self.rotate_after = rotate_after
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._current = bytearray((self.size + 7) // 8)
+        self._previous = bytearray(len(self._current))
+        self._count = 0
+        self._rotated_at = time.monotonic()
+
+    def _positions(self, key: str) -> List[int]:
+        # Kirsch-Mitzenmacher double hashing from one 128-bit digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def _maybe_rotate(self) -> None:
+        if self._count >= self.capacity or time.monotonic() - self._rotated_at >= self.rotate_after:
+            self._previous = self._current
+            self._current = bytearray(len(self._previous))
+            self._count = 0
+            self._rotated_at = time.monotonic()
+
+    def add(self, key: str) -> None:
+        self._maybe_rotate()
+        bits = self._current
+        for pos in self._positions(key):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self._count += 1
+
+    def __contains__(self, key: str) -> bool:
+        self._maybe_rotate()
+        positions = self._positions(key)
+        for bits in (self._current, self._previous):
+            if all(bits[pos >> 3] & (1 << (pos & 7)) for pos in positions):
+                return True
+        return False
+
+
+class _NegativeCache:
+    """Remembers upstream misses so known-missing IDs are answered locally.
+
+    Only the exact map answers lookups, so an entry never outlives its TTL. The Bloom filter
+    only decides that TTL: a key already in it has missed before and gets the longer one.
+    """
+
+    def __init__(self):
+        self._recent: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._bloom = (
+            _RotatingBloomFilter(NEGATIVE_BLOOM_CAPACITY, NEGATIVE_BLOOM_ERROR_RATE, NEGATIVE_BLOOM_ROTATE)
+            if NEGATIVE_BLOOM_CAPACITY > 0
+            else None
+        )
+
+    def add(self, key: str, status_code: int) -> None:
+        ttl = NEGATIVE_CACHE_TTL
+        if self._bloom is not None:
+            if key in self._bloom:
+                ttl = max(ttl, NEGATIVE_CACHE_REPEAT_TTL)
+            else:
+                self._bloom.add(key)
+        if ttl <= 0:
+            return
+        self._recent[key] = (time.monotonic() + ttl, status_code)
+        self._recent.move_to_end(key)
+        while len(self._recent) > NEGATIVE_CACHE_MAX_ENTRIES:
+            self._recent.popitem(last=False)
+
+    def lookup(self, key: str) -> Optional[int]:
+        """Return the remembered status code for a known-missing key, else None."""
+        if recent := self._recent.get(key):
+            expires_at, status_code = recent
+            if time.monotonic() < expires_at:
+                return status_code
+            del self._recent[key]
+        return None
+
+
+class _CacheEntry:
+    __slots__ = ("body", "ttl", "expires_at", "stale_until", "hits")
+
+    def __init__(self, body: bytes, ttl: float, hits: int = 0):
+        now = time.monotonic()
+        self.body = body
+        self.ttl = ttl
+        self.expires_at = now + ttl
+        self.stale_until = self.expires_at + CACHE_STALE_TTL
+        self.hits = hits
+
+    def extend(self, ttl: float) -> None:
+        """Lengthen the entry's lifetime to ttl, counted from when it was fetched."""
+        self.expires_at += ttl - self.ttl
+        self.stale_until += ttl - self.ttl
+        self.ttl = ttl
+
+
+def _cache_ttl_for(url: str) -> float:
+    if url.endswith("/playbackinfo"):
+        return PLAYBACK_CACHE_TTL
+    return UPSTREAM_CACHE_TTL
+
+
+def _cache_key(url: str, params: Optional[dict]) -> str:
+    # Calls without a countryCode (playbackinfo) still depend on the region of the credential used
+    if not params or "countryCode" not in params:
+        url = f"{url}#{_country()}"
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted((k, str(v)) for k, v in params.items() if v is not None))}"
+
+
+async def _upstream_get(
+    url: str,
+    params: Optional[dict] = None,
+    token: Optional[str] = None,
+    cred: Optional[dict] = None,
+) -> Tuple[bytes, str, dict]:
+    """Authenticated GET returning raw body bytes, retrying once on 401. Raises httpx errors."""
     if token is None:
         token, cred = await get_tidal_token_for_cred(cred=cred)
-    client = await get_http_client()
+
+    client = await get_http_client(url)
     headers = {"authorization": f"Bearer {token}"}
+    resp = await client.get(url, headers=headers, params=params)
 
-    try:
+    if resp.status_code == 401:
+        # Token expired, refresh and retry
+        token, cred = await get_tidal_token_for_cred(force_refresh=True, cred=cred)
+        headers["authorization"] = f"Bearer {token}"
         resp = await client.get(url, headers=headers, params=params)
 
-        if resp.status_code == 401:
-            # Token expired, refresh and retry
-            token, cred = await get_tidal_token_for_cred(force_refresh=True, cred=cred)
-            headers = {"authorization": f"Bearer {token}"}
-            resp = await client.get(url, headers=headers, params=params)
+    resp.raise_for_status()
+    return resp.content, token, cred
+
+
+class _UpstreamCache:
+    """LRU of raw upstream bodies with request coalescing, refresh-ahead for hot keys and
+    stale-while-revalidate. Bodies are stored as bytes so callers always get a private copy."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._refresh_budget = _TokenBucket(CACHE_REFRESH_RATE, CACHE_REFRESH_BURST)
+        self._negative = _NegativeCache()
+
+    async def get(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        token: Optional[str] = None,
+        cred: Optional[dict] = None,
+        min_ttl: float = 0,
+    ) -> Tuple[bytes, Optional[str], Optional[dict]]:
+        key = _cache_key(url, params)
+        ttl = _cache_ttl_for(url)
+        if ttl <= 0 or self.max_entries <= 0:
+            self._check_negative(key)
+            return await self._fetch(key, url, params, token, cred)
+        ttl = max(ttl, min_ttl)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = time.monotonic()
+            if now < entry.expires_at:
+                if entry.ttl < ttl:
+                    entry.extend(ttl)
+                entry.hits += 1
+                self._entries.move_to_end(key)
+                if entry.hits >= CACHE_HOT_HITS and entry.expires_at - now < entry.ttl * CACHE_REFRESH_AHEAD:
+                    self._refresh(key, url, params, ttl, entry.hits)
+                return entry.body, token, cred
+            if now < entry.stale_until:
+                entry.hits += 1
+                self._refresh(key, url, params, ttl, entry.hits)
+                return entry.body, token, cred
+
+        self._check_negative(key)
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._start_fill(key, url, params, ttl, token, cred, hits=entry.hits // 2 if entry else 0)
+        body, new_token, new_cred = await asyncio.shield(task)
+        return body, new_token or token, new_cred or cred
+
+    def _check_negative(self, key: str) -> None:
+        if (status_code := self._negative.lookup(key)) is not None:
+            raise HTTPException(status_code=status_code, detail="Resource not found")
+
+    def _start_fill(self, key, url, params, ttl, token, cred, hits: int) -> asyncio.Task:
+        # The fetch runs in its own task so one caller disconnecting doesn't fail the whole herd
+        task = asyncio.create_task(self._fill(key, url, params, ttl, token, cred, hits))
+        self._inflight[key] = task
+
+        def _done(t: asyncio.Task):
+            self._inflight.pop(key, None)
+            if not t.cancelled() and t.exception() is not None:
+                logger.debug("Upstream fill failed for %s: %s", key, t.exception())
+
+        task.add_done_callback(_done)
+        return task
+
+    async def _fetch(self, key, url, params, token, cred):
+        try:
+            body = await _cluster.fetch_from_owner(key, url, params)
+            if body is None:
+                body, token, cred = await _upstream_get(url, params, token, cred)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code in _NEGATIVE_STATUSES:
+                self._negative.add(key, e.response.status_code)
+            raise
+        if url.startswith("https://api.tidal.com/v1/"):
+            _entity_store.ingest(body, (params or {}).get("countryCode") or _country())
+        return body, token, cred
+
+    async def _fill(self, key, url, params, ttl, token, cred, hits: int):
+        body, token, cred = await self._fetch(key, url, params, token, cred)
+        self.store(key, body, ttl, hits)
+        return body, token, cred
+
+    def _refresh(self, key, url, params, ttl, hits: int) -> None:
+        """Background revalidation, limited by the refresh budget."""
+        if key in self._inflight or not self._refresh_budget.try_acquire():
+            return
+        # Popularity decays across refreshes so keys that cool down stop being refreshed
+        self._start_fill(key, url, params, ttl, None, None, hits // 2)
+
+    def store(self, key: str, body: bytes, ttl: float, hits: int = 0) -> None:
+        if (old := self._entries.pop(key, None)) is not None:
+            self.size -= len(old.body)
+        # A body over a tenth of the budget would flush most of the cache, so it isn't kept
+        if len(body) > self.max_bytes // 10:
+            return
+        self._entries[key] = _CacheEntry(body, ttl, hits)
+        self.size += len(body)
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted.body)
+
+
+_upstream_cache = _UpstreamCache(UPSTREAM_CACHE_MAX_ENTRIES, UPSTREAM_CACHE_MAX_BYTES)
+
+
+# Cluster mode: PEERS lists every node's base URL (including this one), SELF_URL names this node
+PEERS = [peer.strip().rstrip("/") for peer in os.getenv("PEERS", "").split(",") if peer.strip()]
+SELF_URL = os.getenv("SELF_URL", "").rstrip("/")
+PEER_SECRET = os.getenv("PEER_SECRET", "")
+PEER_TIMEOUT = float(os.getenv("PEER_TIMEOUT", "15"))
+# How long a peer that failed a request is skipped before being tried again
+PEER_DOWN_COOLDOWN = float(os.getenv("PEER_DOWN_COOLDOWN", "10"))
+PEER_VNODES = int(os.getenv("PEER_VNODES", "128"))
+
+# Upstream hosts a peer may ask this node to fetch
+_PEER_FETCH_PREFIXES = ("https://api.tidal.com/", "https://tidal.com/v1/", "https://openapi.tidal.com/")
+
+# Set while serving a peer's request so it is never forwarded again
+_peer_request_ctx: ContextVar[bool] = ContextVar("peer_request", default=False)
 
-        resp.raise_for_status()
-        return {"version": API_VERSION, "data": resp.json()}
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def _cred_id(cred: dict) -> str:
+    return hashlib.blake2b(f"{cred['client_id']}:{cred['refresh_token']}".encode(), digest_size=8).hexdigest()
+
+
+class _HashRing:
+    """Consistent-hash ring with virtual nodes; adding or removing a node moves ~1/N of the keys."""
+
+    def __init__(self, nodes: List[str], vnodes: int):
+        points = sorted((_hash64(f"{node}#{i}"), node) for node in nodes for i in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def owner(self, key: str) -> str:
+        index = bisect.bisect(self._hashes, _hash64(key)) % len(self._hashes)
+        return self._nodes[index]
+
+
+class _PeerUnavailable(Exception):
+    pass
+
+
+class _Cluster:
+    """Routes upstream cache misses and credential refreshes to their owning node.
+
+    Any peer failure falls back to doing the work locally, so a dead owner only costs the
+    extra upstream traffic it would have saved.
+    """
+
+    def __init__(self, peers: List[str], self_url: str):
+        self.self_url = self_url
+        self.peers = peers
+        self.enabled = bool(self_url and len(peers) > 1 and self_url in peers)
+        if peers and not self.enabled:
+            logger.warning("Cluster mode disabled: SELF_URL must be one of at least two PEERS")
+        if self.enabled and not PEER_SECRET:
+            # Peer endpoints hand out access tokens, so they must never be open
+            logger.error("Cluster mode disabled: PEER_SECRET must be set")
+            self.enabled = False
+        self._ring = _HashRing(peers, PEER_VNODES) if self.enabled else None
+        self._down_until: Dict[str, float] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def start(self) -> None:
+        if self.enabled and self._client is None:
+            # httpx negotiates HTTP/2 only over TLS; plain-http peers need h2c with prior knowledge,
+            # which Hypercorn serves but uvicorn doesn't (uvicorn peers stay on HTTP/1.1 keep-alive)
+            h2c = SERVER == "hypercorn" and all(peer.startswith("http://") for peer in self.peers)
+            self._client = httpx.AsyncClient(
+                http1=not h2c,
+                http2=True,
+                timeout=httpx.Timeout(PEER_TIMEOUT, connect=2.0),
+                limits=httpx.Limits(max_keepalive_connections=50, max_connections=100, keepalive_expiry=60.0),
+                headers={"x-peer-secret": PEER_SECRET, "accept-encoding": "identity"},
+            )
+
+    async def stop(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _remote_owner(self, key: str) -> Optional[str]:
+        """The owning peer for key, or None when this node should do the work itself."""
+        if not self.enabled or self._client is None or _peer_request_ctx.get():
+            return None
+        owner = self._ring.owner(key)
+        if owner == self.self_url or time.monotonic() < self._down_until.get(owner, 0):
+            return None
+        return owner
+
+    async def _call(self, owner: str, method: str, path: str, **kwargs) -> httpx.Response:
+        try:
+            resp = await self._client.request(method, f"{owner}{path}", **kwargs)
+        except httpx.HTTPError as e:
+            self._down_until[owner] = time.monotonic() + PEER_DOWN_COOLDOWN
+            raise _PeerUnavailable(str(e))
+        if resp.status_code >= 500 or resp.status_code in (401, 403, 429):
+            # Owner overloaded or misconfigured; its upstream failures would repeat here anyway
+            self._down_until[owner] = time.monotonic() + PEER_DOWN_COOLDOWN
+            raise _PeerUnavailable(f"HTTP {resp.status_code}")
+        return resp
+
+    async def fetch_from_owner(self, key: str, url: str, params: Optional[dict]) -> Optional[bytes]:
+        """Body from the owning peer's cache; None means fetch locally. Misses raise HTTPStatusError."""
+        owner = self._remote_owner(key)
+        if owner is None:
+            return None
+        try:
+            resp = await self._call(
+                owner, "POST", "/_peer/fetch", json={"url": url, "params": params or {}, "country": _country()}
+            )
+        except _PeerUnavailable as e:
+            logger.warning("Peer %s unavailable, fetching upstream: %s", owner, e, extra={"sample_key": f"peer:{owner}"})
+            return None
+        if resp.status_code != 200:
+            raise httpx.HTTPStatusError(f"Peer {owner} returned {resp.status_code}", request=resp.request, response=resp)
+        return resp.content
+
+    async def borrow_token(self, cred: dict) -> bool:
+        """Take the owning peer's access token for cred. False means refresh locally."""
+        cred_key = _cred_id(cred)
+        owner = self._remote_owner(f"cred:{cred_key}")
+        if owner is None:
+            return False
+        try:
+            resp = await self._call(
+                owner, "GET", "/_peer/token", params={"cred": cred_key, "stale": cred["access_token"] or ""}
+            )
+            data = resp.json()
+            cred["access_token"] = data["access_token"]
+            cred["expires_at"] = time.time() + data["expires_in"]
+            return True
+        except (_PeerUnavailable, ValueError, KeyError) as e:
+            logger.warning("Token borrow from %s failed, refreshing locally: %s", owner, e, extra={"sample_key": f"peer:{owner}"})
+            return False
+
+
+_cluster = _Cluster(PEERS, SELF_URL)
+
+
+async def make_request(url: str, token: Optional[str] = None, params: Optional[dict] = None, cred: Optional[dict] = None):
+    try:
+        body, token, cred = await _upstream_cache.get(url, params, token, cred)
+        return {"version": API_VERSION, "data": _loads(body)}
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 404:
             raise HTTPException(status_code=404, detail="Resource not found")
         else:
-            logger.error(
-                "Upstream API error %s %s %s",
-                e.response.status_code,
-                url,
-                e.response.text,
-                exc_info=e,
-            )
+            _log_upstream_error(e.response, url)
             raise HTTPException(status_code=e.response.status_code, detail="Upstream API error")
     except httpx.RequestError as e:
         if isinstance(e, httpx.TimeoutException):
@@ -226,22 +1756,9 @@ async def authed_get_json(
 ):
     """Perform an authenticated GET, retrying once on 401. Returns payload with updated token/cred."""
 
-    if token is None:
-        token, cred = await get_tidal_token_for_cred(cred=cred)
-
-    client = await get_http_client()
-    headers = {"authorization": f"Bearer {token}"}
-
     try:
-        resp = await client.get(url, headers=headers, params=params)
-
-        if resp.status_code == 401:
-            token, cred = await get_tidal_token_for_cred(force_refresh=True, cred=cred)
-            headers["authorization"] = f"Bearer {token}"
-            resp = await client.get(url, headers=headers, params=params)
-
-        resp.raise_for_status()
-        return resp.json(), token, cred
+        body, token, cred = await _upstream_cache.get(url, params, token, cred)
+        return _loads(body), token, cred
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 404:
             raise HTTPException(status_code=404, detail="Resource not found")
@@ -253,31 +1770,243 @@ async def authed_get_json(
             raise HTTPException(status_code=429, detail="Upstream timeout")
         raise HTTPException(status_code=503, detail="Connection error to Tidal")
 
+def _track_info_request(id: int) -> Tuple[str, dict]:
+    return f"https://api.tidal.com/v1/tracks/{id}/", {"countryCode": _country()}
+
+
+def _playbackinfo_request(id: int, quality: str) -> Tuple[str, dict]:
+    return f"https://tidal.com/v1/tracks/{id}/playbackinfo", {
+        "audioquality": quality,
+        "playbackmode": "STREAM",
+        "assetpresentation": "FULL",
+    }
+
+
+def _recommendations_request(id: int) -> Tuple[str, dict]:
+    return f"https://tidal.com/v1/tracks/{id}/recommendations", {"limit": "20", "countryCode": _country()}
+
+
+def _lyrics_request(id: int) -> Tuple[str, dict]:
+    return f"https://api.tidal.com/v1/tracks/{id}/lyrics", {
+        "countryCode": _country(),
+        "locale": "en_US",
+        "deviceType": "BROWSER",
+    }
+
+
+# Next-play prefetch after /playlist/, /album/ and /mix/. PREFETCH_ITEMS=0 disables it
+PREFETCH_ITEMS = int(os.getenv("PREFETCH_ITEMS", "0"))
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "2"))
+# Stop prefetching for a client that hasn't requested a track/lyrics/cover for this long
+PREFETCH_IDLE = float(os.getenv("PREFETCH_IDLE", "30"))
+# Prefetched entries must outlive the PREFETCH_ITEMS tracks played before they are used
+PREFETCH_TTL = float(os.getenv("PREFETCH_TTL", "1800"))
+PREFETCH_MAX_SESSIONS = int(os.getenv("PREFETCH_MAX_SESSIONS", "10000"))
+
+
+def _listing_track_ids(items: List[dict]) -> List[int]:
+    """Track ids, in order, from playlist/album items ({item, type}) or unwrapped mix items."""
+    ids = []
+    for entry in items:
+        track = entry.get("item", entry)
+        if entry.get("type", "track") == "track" and (track_id := track.get("id")):
+            ids.append(track_id)
+    return ids
+
+
+class _PrefetchSession:
+    __slots__ = ("track_ids", "positions", "next_index", "target", "last_seen", "task", "country")
+
+    def __init__(self, track_ids: List[int]):
+        self.track_ids = track_ids
+        self.country = _country()
+        self.positions = {track_id: i for i, track_id in enumerate(track_ids)}
+        self.next_index = 0
+        self.target = 0
+        self.last_seen = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+
+
+class _Prefetcher:
+    """Warms the upstream cache with playback info, track info (covers) and lyrics for the next
+    items of the listing a client just loaded, sliding forward as the client plays through it."""
+
+    def __init__(self):
+        self._sessions: "OrderedDict[str, _PrefetchSession]" = OrderedDict()
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    @property
+    def enabled(self) -> bool:
+        return PREFETCH_ITEMS > 0 and UPSTREAM_CACHE_TTL > 0
+
+    def schedule(self, client: str, track_ids: List[int]) -> None:
+        """Start a session for a freshly served listing, replacing the client's previous one."""
+        if not self.enabled or not client or not track_ids:
+            return
+        if old := self._sessions.pop(client, None):
+            if old.task:
+                old.task.cancel()
+        session = self._sessions[client] = _PrefetchSession(track_ids)
+        while len(self._sessions) > PREFETCH_MAX_SESSIONS:
+            _, evicted = self._sessions.popitem(last=False)
+            if evicted.task:
+                evicted.task.cancel()
+        self._extend(session, PREFETCH_ITEMS)
+
+    def advance(self, client: str, track_id: int) -> None:
+        """Client touched a track; keep the window PREFETCH_ITEMS ahead of it."""
+        session = self._sessions.get(client)
+        if session is None:
+            return
+        session.last_seen = time.monotonic()
+        self._sessions.move_to_end(client)
+        if (position := session.positions.get(track_id)) is not None:
+            self._extend(session, position + 1 + PREFETCH_ITEMS)
+
+    def _extend(self, session: _PrefetchSession, target: int) -> None:
+        session.target = max(session.target, min(target, len(session.track_ids)))
+        if session.next_index < session.target and (session.task is None or session.task.done()):
+            session.task = asyncio.create_task(self._run(session))
+
+    async def _run(self, session: _PrefetchSession) -> None:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+        # Runs in its own task; warm the region the listing was served for
+        _country_ctx.set(session.country)
+        while session.next_index < session.target:
+            if time.monotonic() - session.last_seen > PREFETCH_IDLE:
+                return
+            # Low priority: yield entirely while user traffic saturates admission
+            if _admission.max_inflight > 0 and _admission.inflight >= _admission.max_inflight:
+                return
+            track_id = session.track_ids[session.next_index]
+            session.next_index += 1
+            async with self._sem:
+                # Playback info is left out: its signed URLs expire long before the track is reached
+                await asyncio.gather(
+                    _upstream_cache.get(*_track_info_request(track_id), min_ttl=PREFETCH_TTL),
+                    _upstream_cache.get(*_lyrics_request(track_id), min_ttl=PREFETCH_TTL),
+                    return_exceptions=True,
+                )
+
+
+_prefetcher = _Prefetcher()
+
+
 @app.get("/")
 async def index():
     return {"version": API_VERSION, "Repo": "https://github.com/uimaxbai/hifi-api"}
 
 @app.get("/info/")
 async def get_info(id: int):
-    url = f"https://api.tidal.com/v1/tracks/{id}/"
-    return await make_request(url, params={"countryCode": COUNTRY_CODE})
+    if (track := await _entity_store.get("track", id, _country())) is not None:
+        return {"version": API_VERSION, "data": track}
+    url, params = _track_info_request(id)
+    return await make_request(url, params=params)
 
 @app.get("/track/")
 async def get_track(id: int, quality: str = "HI_RES_LOSSLESS"):
-    track_url = f"https://tidal.com/v1/tracks/{id}/playbackinfo"
-    params = {
-        "audioquality": quality,
-        "playbackmode": "STREAM",
-        "assetpresentation": "FULL",
-    }
+    _prefetcher.advance(_client_ctx.get(), id)
+    track_url, params = _playbackinfo_request(id, quality)
     return await make_request(track_url, params=params)
 
 
 @app.get("/recommendations/")
 async def get_recommendations(id: int):
-    recommendations_url = f"https://tidal.com/v1/tracks/{id}/recommendations"
-    params = {"limit": "20", "countryCode": "US"}
-    return await make_request(recommendations_url, params=params)
+    url, params = _recommendations_request(id)
+    return await make_request(url, params=params)
+
+
+# /radio/ limits: tracks per response, recommendation pages fetched at once and in total
+RADIO_MAX_TRACKS = int(os.getenv("RADIO_MAX_TRACKS", "500"))
+RADIO_CONCURRENCY = int(os.getenv("RADIO_CONCURRENCY", "4"))
+RADIO_MAX_PAGES = int(os.getenv("RADIO_MAX_PAGES", "100"))
+
+
+async def _radio_page(track_id: int) -> List[dict]:
+    """One recommendation page (via the upstream cache, so overlapping radios share pages)."""
+    url, params = _recommendations_request(track_id)
+    return (await make_request(url, params=params))["data"].get("items") or []
+
+
+@app.get("/radio/")
+async def get_radio(
+    id: int,
+    limit: int = Query(default=50, ge=1),
+):
+    """Stream a deduplicated queue built by walking recommendations breadth-first from a seed track.
+
+    Each NDJSON line is {"depth": <hops from the seed>, "from": <track recommending it>, "track": {...}}.
+    Tracks are deduplicated by id and ISRC, so other releases of the same recording appear once.
+    """
+    limit = min(limit, RADIO_MAX_TRACKS)
+    seen_ids = {id}
+    seen_isrcs = set()
+
+    # Seed page first, so an unknown track is a plain 404 rather than an empty stream
+    seed_info, first_page = await asyncio.gather(
+        _upstream_cache.get(*_track_info_request(id)),
+        _radio_page(id),
+        return_exceptions=True,
+    )
+    if isinstance(first_page, BaseException):
+        raise first_page
+    if not isinstance(seed_info, BaseException) and (isrc := _loads(seed_info[0]).get("isrc")):
+        seen_isrcs.add(isrc)
+    tree = _fields_ctx.get()
+
+    def fresh(items: List[dict], parent: int, depth: int):
+        for item in items:
+            track = item.get("track") or {}
+            track_id, isrc = track.get("id"), track.get("isrc")
+            if track_id is None or track_id in seen_ids or (isrc and isrc in seen_isrcs):
+                continue
+            seen_ids.add(track_id)
+            if isrc:
+                seen_isrcs.add(isrc)
+            line = {"depth": depth, "from": parent, "track": track}
+            yield track_id, _dumps(_project(line, tree) if tree else line) + b"\n"
+
+    async def stream():
+        emitted = 0
+        pages = 1
+        frontier = deque()
+        pending: Dict[asyncio.Task, Tuple[int, int]] = {}
+        try:
+            for track_id, line in fresh(first_page, id, 1):
+                yield line
+                frontier.append((track_id, 2))
+                emitted += 1
+                if emitted >= limit:
+                    return
+
+            while True:
+                while frontier and len(pending) < RADIO_CONCURRENCY and pages < RADIO_MAX_PAGES:
+                    parent, depth = frontier.popleft()
+                    pending[asyncio.create_task(_radio_page(parent))] = (parent, depth)
+                    pages += 1
+                if not pending:
+                    return
+
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    parent, depth = pending.pop(task)
+                    try:
+                        items = task.result()
+                    except HTTPException as e:
+                        logger.info("Radio page for %s skipped: %s", parent, e.detail, extra={"sample_key": "radio:page"})
+                        continue
+                    for track_id, line in fresh(items, parent, depth):
+                        yield line
+                        frontier.append((track_id, depth + 1))
+                        emitted += 1
+                        if emitted >= limit:
+                            return
+        finally:
+            for task in pending:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 @app.api_route("/search/", methods=["GET"])
@@ -294,35 +2023,35 @@ async def search(
             "query": s,
             "limit": 25,
             "offset": 0,
-            "countryCode": COUNTRY_CODE,
+            "countryCode": _country(),
         }),
         (a, "https://api.tidal.com/v1/search/top-hits", {
             "query": a,
             "limit": 25,
             "offset": 0,
             "types": "ARTISTS,TRACKS",
-            "countryCode": COUNTRY_CODE,
+            "countryCode": _country(),
         }),
         (al, "https://api.tidal.com/v1/search/top-hits", {
             "query": al,
             "limit": 25,
             "offset": 0,
             "types": "ALBUMS",
-            "countryCode": COUNTRY_CODE,
+            "countryCode": _country(),
         }),
         (v, "https://api.tidal.com/v1/search/top-hits", {
             "query": v,
             "limit": 25,
             "offset": 0,
             "types": "VIDEOS",
-            "countryCode": COUNTRY_CODE,
+            "countryCode": _country(),
         }),
         (p, "https://api.tidal.com/v1/search/top-hits", {
             "query": p,
             "limit": 25,
             "offset": 0,
             "types": "PLAYLISTS",
-            "countryCode": COUNTRY_CODE,
+            "countryCode": _country(),
         }),
     )
 
@@ -353,7 +2082,7 @@ async def get_album(
         )
         return payload
 
-    tasks = [fetch(album_url, {"countryCode": COUNTRY_CODE})]
+    tasks = [fetch(album_url, {"countryCode": _country()})]
 
     max_chunk = 100
     current_offset = offset
@@ -362,7 +2091,7 @@ async def get_album(
     while remaining_limit > 0:
         chunk_size = min(remaining_limit, max_chunk)
         tasks.append(
-            fetch(items_url, {"countryCode": COUNTRY_CODE, "limit": chunk_size, "offset": current_offset})
+            fetch(items_url, {"countryCode": _country(), "limit": chunk_size, "offset": current_offset})
         )
         current_offset += chunk_size
         remaining_limit -= chunk_size
@@ -378,11 +2107,12 @@ async def get_album(
         all_items.extend(page_items)
 
     album_data["items"] = all_items
+    _prefetcher.schedule(_client_ctx.get(), _listing_track_ids(all_items))
 
-    return {
+    return ProjectedJSONResponse({
         "version": API_VERSION,
         "data": album_data,
-    }
+    })
 
 
 @app.get("/mix/")
@@ -394,7 +2124,7 @@ async def get_mix(
     url = "https://api.tidal.com/v1/pages/mix"
     params = {
         "mixId": id,
-        "countryCode": COUNTRY_CODE,
+        "countryCode": _country(),
         "deviceType": "BROWSER",
     }
 
@@ -418,11 +2148,14 @@ async def get_mix(
                 paged_list = module.get("pagedList", {})
                 items = paged_list.get("items", [])
 
-    return {
+    items = [item.get("item", item) for item in items]
+    _prefetcher.schedule(_client_ctx.get(), _listing_track_ids(items))
+
+    return ProjectedJSONResponse({
         "version": API_VERSION,
         "mix": header,
-        "items": [item.get("item", item) for item in items],
-    }
+        "items": items,
+    })
 
 
 @app.get("/playlist/")
@@ -449,15 +2182,18 @@ async def get_playlist(
         return payload
 
     playlist_data, items_data = await asyncio.gather(
-        fetch(playlist_url, {"countryCode": COUNTRY_CODE}),
-        fetch(items_url, {"countryCode": COUNTRY_CODE, "limit": limit, "offset": offset}),
+        fetch(playlist_url, {"countryCode": _country()}),
+        fetch(items_url, {"countryCode": _country(), "limit": limit, "offset": offset}),
     )
 
-    return {
+    items = items_data.get("items", items_data)
+    _prefetcher.schedule(_client_ctx.get(), _listing_track_ids(items))
+
+    return ProjectedJSONResponse({
         "version": API_VERSION,
         "playlist": playlist_data,
-        "items": items_data.get("items", items_data),
-    }
+        "items": items,
+    })
 
 
 def _extract_uuid_from_tidal_url(href: str) -> Optional[str]:
@@ -466,101 +2202,157 @@ def _extract_uuid_from_tidal_url(href: str) -> Optional[str]:
     return "-".join(parts[4:9]) if len(parts) >= 9 else None
 
 
+def _int_id(value: str) -> Union[int, str]:
+    return int(value) if value.isdigit() else value
+
+
+class _JsonApiDocument:
+    """One openapi.tidal.com JSON:API page with a single (type, id) index over `included`."""
+
+    __slots__ = ("data", "_index", "_images")
+
+    def __init__(self, payload: dict):
+        self.data: List[dict] = payload.get("data", [])
+        self._index: Dict[Tuple[str, str], dict] = {(i["type"], i["id"]): i for i in payload.get("included", [])}
+        self._images: Dict[str, Optional[str]] = {}
+
+    def resolve(self, ref: dict) -> dict:
+        """Return the included resource for a {type, id} linkage, or {} if it wasn't included."""
+        return self._index.get((ref.get("type"), ref.get("id")), {})
+
+    def related(self, resource: dict, name: str) -> List[dict]:
+        linkage = resource.get("relationships", {}).get(name, {}).get("data") or []
+        if isinstance(linkage, dict):
+            linkage = [linkage]
+        return [inc for ref in linkage if (inc := self.resolve(ref))]
+
+    def image_id(self, resource: dict, name: str) -> Optional[str]:
+        """Image UUID of the first artwork related through `name` (e.g. profileArt, coverArt)."""
+        for artwork in self.related(resource, name):
+            artwork_id = artwork["id"]
+            if artwork_id not in self._images:
+                files = artwork.get("attributes", {}).get("files")
+                self._images[artwork_id] = _extract_uuid_from_tidal_url(files[0].get("href")) if files else None
+            return self._images[artwork_id]
+        return None
+
+
+def _jsonapi_next_cursor(payload: dict) -> Optional[str]:
+    links = payload.get("links") or {}
+    if cursor := (links.get("meta") or {}).get("nextCursor"):
+        return cursor
+    if next_link := links.get("next"):
+        return parse_qs(urlsplit(next_link).query).get("page[cursor]", [None])[0]
+    return None
+
+
+async def _jsonapi_pages(url: str, params: dict, max_pages: int):
+    """Yield (document, next_cursor) pages following page[cursor], fetching page n+1 while page n is resolved."""
+    pending = asyncio.create_task(authed_get_json(url, params=params))
+    pages = 0
+    try:
+        while pending is not None:
+            payload, token, cred = await pending
+            pending = None
+            pages += 1
+            cursor = _jsonapi_next_cursor(payload)
+            if cursor and pages < max_pages:
+                pending = asyncio.create_task(
+                    authed_get_json(url, params={**params, "page[cursor]": cursor}, token=token, cred=cred)
+                )
+            yield _JsonApiDocument(payload), cursor
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+async def _collect_jsonapi(url: str, params: dict, resolve, *, follow: bool, max_pages: int):
+    """Resolve every primary resource across pages, deduped by id. Returns (items, next_cursor)."""
+    items = []
+    seen = set()
+    cursor = None
+    async for doc, cursor in _jsonapi_pages(url, params, max_pages if follow else 1):
+        for ref in doc.data:
+            if ref["id"] not in seen:
+                seen.add(ref["id"])
+                items.append(resolve(doc, ref))
+    return items, cursor
+
+
+def _resolve_similar_artist(doc: _JsonApiDocument, ref: dict) -> dict:
+    aid = ref["id"]
+    inc = doc.resolve(ref)
+    # attributes belong to this payload only, so enrich them in place instead of copying
+    attr = inc.get("attributes", {})
+    attr["picture"] = doc.image_id(inc, "profileArt") or attr.get("selectedAlbumCoverFallback")
+    attr["id"] = _int_id(aid)
+    attr["url"] = f"http://www.tidal.com/artist/{aid}"
+    attr["relationType"] = "SIMILAR_ARTIST"
+    return attr
+
+
+def _resolve_similar_album(doc: _JsonApiDocument, ref: dict) -> dict:
+    aid = ref["id"]
+    inc = doc.resolve(ref)
+    attr = inc.get("attributes", {})
+    attr["id"] = _int_id(aid)
+    attr["cover"] = doc.image_id(inc, "coverArt")
+    attr["artists"] = [
+        {"id": _int_id(artist["id"]), "name": artist["attributes"]["name"]}
+        for artist in doc.related(inc, "artists")
+    ]
+    attr["url"] = f"http://www.tidal.com/album/{aid}"
+    return attr
+
+
 @app.get("/artist/similar/")
 async def get_similar_artists(
     id: int = Query(..., description="Artist ID"),
-    cursor: Union[int, str, None] = None
+    cursor: Union[int, str, None] = None,
+    follow: bool = Query(default=False, alias="all", description="Follow page[cursor] links"),
+    max_pages: int = Query(default=10, ge=1, le=50, alias="max", description="Page cap when all=true"),
 ):
     """Fetch artists similar to another by its ID using V2 API."""
     url = f"https://openapi.tidal.com/v2/artists/{id}/relationships/similarArtists"
     params = {
         "page[cursor]": cursor,
-        "countryCode": COUNTRY_CODE,
+        "countryCode": _country(),
         "include": "similarArtists,similarArtists.profileArt"
     }
 
-    payload, _, _ = await authed_get_json(url, params=params)
-    included = payload.get("included", [])
-    artists_map = {i["id"]: i for i in included if i["type"] == "artists"}
-    artworks_map = {i["id"]: i for i in included if i["type"] == "artworks"}
-
-    def resolve_artist(entry):
-        aid = entry["id"]
-        inc = artists_map.get(aid, {})
-        attr = inc.get("attributes", {})
-
-        pic_id = None
-        if art_data := inc.get("relationships", {}).get("profileArt", {}).get("data"):
-            if artwork := artworks_map.get(art_data[0].get("id")):
-                if files := artwork.get("attributes", {}).get("files"):
-                    pic_id = _extract_uuid_from_tidal_url(files[0].get("href"))
-
-        return {
-            **attr,
-            "id": int(aid) if aid.isdigit() else aid,
-            "picture": pic_id or attr.get("selectedAlbumCoverFallback"),
-            "url": f"http://www.tidal.com/artist/{aid}",
-            "relationType": "SIMILAR_ARTIST"
-        }
-
-    return {
+    artists, next_cursor = await _collect_jsonapi(
+        url, params, _resolve_similar_artist, follow=follow, max_pages=max_pages
+    )
+    return ProjectedJSONResponse({
         "version": API_VERSION,
-        "artists": [resolve_artist(e) for e in payload.get("data", [])]
-    }
+        "artists": artists,
+        "cursor": next_cursor,
+    })
 
 
 @app.get("/album/similar/")
 async def get_similar_albums(
     id: int = Query(..., description="Album ID"),
-    cursor: Union[int, str, None] = None
+    cursor: Union[int, str, None] = None,
+    follow: bool = Query(default=False, alias="all", description="Follow page[cursor] links"),
+    max_pages: int = Query(default=10, ge=1, le=50, alias="max", description="Page cap when all=true"),
 ):
     """Fetch albums similar to another by its ID using V2 API."""
     url = f"https://openapi.tidal.com/v2/albums/{id}/relationships/similarAlbums"
     params = {
         "page[cursor]": cursor,
-        "countryCode": COUNTRY_CODE,
+        "countryCode": _country(),
         "include": "similarAlbums,similarAlbums.coverArt,similarAlbums.artists"
     }
 
-    payload, _, _ = await authed_get_json(url, params=params)
-    included = payload.get("included", [])
-    albums_map = {i["id"]: i for i in included if i["type"] == "albums"}
-    artworks_map = {i["id"]: i for i in included if i["type"] == "artworks"}
-    artists_map = {i["id"]: i for i in included if i["type"] == "artists"}
-
-    def resolve_album(entry):
-        aid = entry["id"]
-        inc = albums_map.get(aid, {})
-        attr = inc.get("attributes", {})
-
-        cover_id = None
-        if art_data := inc.get("relationships", {}).get("coverArt", {}).get("data"):
-            if artwork := artworks_map.get(art_data[0].get("id")):
-                if files := artwork.get("attributes", {}).get("files"):
-                    cover_id = _extract_uuid_from_tidal_url(files[0].get("href"))
-
-        artist_list = []
-        if art_data := inc.get("relationships", {}).get("artists", {}).get("data"):
-             for a_entry in art_data:
-                 if a_obj := artists_map.get(a_entry["id"]):
-                     a_id = a_obj["id"]
-                     artist_list.append({
-                         "id": int(a_id) if a_id.isdigit() else a_id,
-                         "name": a_obj["attributes"]["name"]
-                     })
-
-        return {
-            **attr,
-            "id": int(aid) if aid.isdigit() else aid,
-            "cover": cover_id,
-            "artists": artist_list,
-            "url": f"http://www.tidal.com/album/{aid}"
-        }
-
-    return {
+    albums, next_cursor = await _collect_jsonapi(
+        url, params, _resolve_similar_album, follow=follow, max_pages=max_pages
+    )
+    return ProjectedJSONResponse({
         "version": API_VERSION,
-        "albums": [resolve_album(e) for e in payload.get("data", [])]
-    }
+        "albums": albums,
+        "cursor": next_cursor,
+    })
 
 
 @app.get("/artist/")
@@ -582,13 +2374,15 @@ async def get_artist(
     token, cred = await get_tidal_token_for_cred()
 
     if id is not None:
-        artist_url = f"https://api.tidal.com/v1/artists/{id}"
-        artist_data, token, cred = await authed_get_json(
-            artist_url,
-            params={"countryCode": COUNTRY_CODE},
-            token=token,
-            cred=cred,
-        )
+        artist_data = await _entity_store.get("artist", id, _country())
+        if artist_data is None:
+            artist_url = f"https://api.tidal.com/v1/artists/{id}"
+            artist_data, token, cred = await authed_get_json(
+                artist_url,
+                params={"countryCode": _country()},
+                token=token,
+                cred=cred,
+            )
 
         picture = artist_data.get("picture")
         fallback = artist_data.get("selectedAlbumCoverFallback")
@@ -610,7 +2404,7 @@ async def get_artist(
 
     # Fetch albums and singles/EPs directly in parallel
     albums_url = f"https://api.tidal.com/v1/artists/{f}/albums"
-    common_params = {"countryCode": COUNTRY_CODE, "limit": 100}
+    common_params = {"countryCode": _country(), "limit": 100}
 
     tasks = [
         authed_get_json(albums_url, params=common_params, token=token, cred=cred),
@@ -621,7 +2415,7 @@ async def get_artist(
         tasks.append(
             authed_get_json(
                 f"https://api.tidal.com/v1/artists/{f}/toptracks",
-                params={"countryCode": COUNTRY_CODE, "limit": 15},
+                params={"countryCode": _country(), "limit": 15},
                 token=token,
                 cred=cred
             )
@@ -629,22 +2423,21 @@ async def get_artist(
 
     results = await asyncio.gather(*tasks, return_exceptions=True)
 
-    unique_releases = []
-    seen_ids = set()
-    
+    # Insertion-ordered dict dedupes releases by id in a single pass
+    releases: Dict[int, dict] = {}
+
     # Process albums (first 2 results)
     for res in results[:2]:
         if isinstance(res, tuple) and len(res) > 0:
             data, token, cred = res # Update tokens from latest responses
             for item in data.get("items", []):
-                if item.get("id") and item["id"] not in seen_ids:
-                    unique_releases.append(item)
-                    seen_ids.add(item["id"])
+                if (item_id := item.get("id")) and item_id not in releases:
+                    releases[item_id] = item
         elif isinstance(res, Exception):
-            print(f"Error fetching artist releases: {res}")
+            logger.warning("Error fetching artist releases: %s", res, extra={"sample_key": "artist_releases"})
 
-    album_ids: List[int] = [item["id"] for item in unique_releases]
-    page_data = {"items": unique_releases}
+    album_ids: List[int] = list(releases)
+    page_data = {"items": list(releases.values())}
 
     if skip_tracks:
         top_tracks = []
@@ -654,12 +2447,12 @@ async def get_artist(
                 data, token, cred = res
                 top_tracks = data.get("items", [])
             elif isinstance(res, Exception):
-                print(f"Error fetching top tracks: {res}")
+                logger.warning("Error fetching top tracks: %s", res, extra={"sample_key": "artist_top_tracks"})
         
-        return {"version": API_VERSION, "albums": page_data, "tracks": top_tracks}
+        return ProjectedJSONResponse({"version": API_VERSION, "albums": page_data, "tracks": top_tracks})
 
     if not album_ids:
-        return {"version": API_VERSION, "albums": page_data, "tracks": []}
+        return ProjectedJSONResponse({"version": API_VERSION, "albums": page_data, "tracks": []})
 
     sem = asyncio.Semaphore(6)
 
@@ -670,7 +2463,7 @@ async def get_artist(
                 "https://api.tidal.com/v1/pages/album",
                 params={
                     "albumId": album_id,
-                    "countryCode": COUNTRY_CODE,
+                    "countryCode": _country(),
                     "deviceType": "BROWSER",
                 },
                 token=token,
@@ -683,10 +2476,8 @@ async def get_artist(
             modules = rows[1].get("modules", [])
             if not modules:
                 return []
-            paged_list = modules[0].get("pagedList", {})
-            items = paged_list.get("items", [])
-            tracks = [track.get("item", track) for track in items]
-            return tracks
+            items = modules[0].get("pagedList", {}).get("items", [])
+            return [track.get("item", track) for track in items]
 
     results = await asyncio.gather(
         *(fetch_album_tracks(album_id) for album_id in album_ids),
@@ -699,7 +2490,25 @@ async def get_artist(
             continue
         tracks.extend(res)
 
-    return {"version": API_VERSION, "albums": page_data, "tracks": tracks}
+    return ProjectedJSONResponse({"version": API_VERSION, "albums": page_data, "tracks": tracks})
+
+
+def _cover_entry(cover_slug: str, name: Optional[str], track_id: Optional[int]) -> dict:
+    slug = cover_slug.replace("-", "/")
+    return {
+        "id": track_id,
+        "name": name,
+        "1280": f"https://resources.tidal.com/images/{slug}/1280x1280.jpg",
+        "640": f"https://resources.tidal.com/images/{slug}/640x640.jpg",
+        "80": f"https://resources.tidal.com/images/{slug}/80x80.jpg",
+    }
+
+
+# /cover/ responses are built here, not by Tidal; a preset must never strip their image URLs
+for _preset in FIELD_PRESETS:
+    _projected = _project({"covers": [_cover_entry("a-b", "name", 1)]}, _compile_fields(_preset))
+    if _projected["covers"][0] != _cover_entry("a-b", "name", 1):
+        raise RuntimeError(f"Field preset {_preset!r} alters /cover/ entries")
 
 
 @app.get("/cover/")
@@ -714,30 +2523,24 @@ async def get_cover(
 
     token, cred = await get_tidal_token_for_cred()
 
-    def build_cover_entry(cover_slug: str, name: Optional[str], track_id: Optional[int]):
-        slug = cover_slug.replace("-", "/")
-        return {
-            "id": track_id,
-            "name": name,
-            "1280": f"https://resources.tidal.com/images/{slug}/1280x1280.jpg",
-            "640": f"https://resources.tidal.com/images/{slug}/640x640.jpg",
-            "80": f"https://resources.tidal.com/images/{slug}/80x80.jpg",
-        }
-
     if id is not None:
-        track_data, token, cred = await authed_get_json(
-            f"https://api.tidal.com/v1/tracks/{id}/",
-            params={"countryCode": COUNTRY_CODE},
-            token=token,
-            cred=cred,
-        )
+        _prefetcher.advance(_client_ctx.get(), id)
+        track_data = await _entity_store.get("track", id, _country())
+        if track_data is None:
+            url, params = _track_info_request(id)
+            track_data, token, cred = await authed_get_json(
+                url,
+                params=params,
+                token=token,
+                cred=cred,
+            )
 
         album = track_data.get("album") or {}
         cover_slug = album.get("cover")
         if not cover_slug:
             raise HTTPException(status_code=404, detail="Cover not found")
 
-        entry = build_cover_entry(
+        entry = _cover_entry(
             cover_slug,
             album.get("title") or track_data.get("title"),
             album.get("id") or id,
@@ -746,7 +2549,7 @@ async def get_cover(
 
     search_data, token, cred = await authed_get_json(
         "https://api.tidal.com/v1/search/tracks",
-        params={"countryCode": COUNTRY_CODE, "query": q, "limit": 10},
+        params={"countryCode": _country(), "query": q, "limit": 10},
         token=token,
         cred=cred,
     )
@@ -762,7 +2565,7 @@ async def get_cover(
         if not cover_slug:
             continue
         covers.append(
-            build_cover_entry(
+            _cover_entry(
                 cover_slug,
                 track.get("title"),
                 track.get("id"),
@@ -777,11 +2580,9 @@ async def get_cover(
 
 @app.get("/lyrics/")
 async def get_lyrics(id: int):
-    url = f"https://api.tidal.com/v1/tracks/{id}/lyrics"
-    data, token, cred = await authed_get_json(
-        url,
-        params={"countryCode": COUNTRY_CODE, "locale": "en_US", "deviceType": "BROWSER"},
-    )
+    _prefetcher.advance(_client_ctx.get(), id)
+    url, params = _lyrics_request(id)
+    data, token, cred = await authed_get_json(url, params=params)
 
     if not data:
         raise HTTPException(status_code=404, detail="Lyrics not found")
@@ -789,5 +2590,284 @@ async def get_lyrics(id: int):
     return {"version": API_VERSION, "lyrics": data}
 
 
+def _check_peer(request: Request) -> None:
+    if not _cluster.enabled or not hmac.compare_digest(request.headers.get("x-peer-secret", ""), PEER_SECRET):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+class PeerFetch(BaseModel):
+    url: str
+    params: Dict[str, Union[str, int, float, bool, None]] = {}
+    country: str = ""
+
+
+@app.post("/_peer/fetch", include_in_schema=False)
+async def peer_fetch(payload: PeerFetch, request: Request):
+    """Serve a non-owner's cache miss from this node's cache (fetching upstream if needed)."""
+    _check_peer(request)
+    if not payload.url.startswith(_PEER_FETCH_PREFIXES):
+        raise HTTPException(status_code=400, detail="URL not allowed")
+
+    _peer_request_ctx.set(True)
+    _country_ctx.set(payload.country.upper() if _COUNTRY_PATTERN.match(payload.country) else "")
+    try:
+        body, _, _ = await _upstream_cache.get(payload.url, payload.params or None)
+    except httpx.HTTPStatusError as e:
+        return Response(content=e.response.content, status_code=e.response.status_code, media_type="application/json")
+    return Response(content=body, media_type="application/json")
+
+
+@app.get("/_peer/token", include_in_schema=False)
+async def peer_token(request: Request, cred: str, stale: str = ""):
+    """Hand a credential's current access token to a peer, refreshing it here if needed."""
+    _check_peer(request)
+    match = next((c for c in _creds if _cred_id(c) == cred), None)
+    if match is None:
+        raise HTTPException(status_code=404, detail="Unknown credential")
+
+    _peer_request_ctx.set(True)
+    # The peer saw `stale` rejected with 401, so don't hand the same token back
+    token, _ = await get_tidal_token_for_cred(force_refresh=bool(stale and stale == match["access_token"]), cred=match)
+    if stale and token == stale:
+        match["expires_at"] = 0
+        token, _ = await get_tidal_token_for_cred(cred=match)
+    return {"access_token": token, "expires_in": max(0, match["expires_at"] - time.time())}
+
+
+
+@app.get("/_pools", include_in_schema=False)
+async def pool_stats():
+    """Occupancy and wait-time counters for each upstream connection pool."""
+    return {"pools": _upstream_pools.snapshot()}
+
+
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+
+class BatchSubRequest(BaseModel):
+    id: str
+    path: str
+    params: Dict[str, Union[str, int, float, bool, None]] = {}
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest]
+
+
+# Streaming (/radio/) and internal routes can't be embedded in a batch line
+@lru_cache(maxsize=1)
+def _batchable_routes() -> Dict[str, APIRoute]:
+    return {
+        route.path: route
+        for route in app.routes
+        if isinstance(route, APIRoute) and "GET" in route.methods and not route.path.startswith(("/batch", "/_", "/radio/"))
+    }
+
+
+def _batch_line(sub_id: str, status_code: int, body: bytes) -> bytes:
+    return b'{"id":' + _dumps(sub_id) + b',"status":' + str(status_code).encode() + b',"body":' + body + b"}\n"
+
+
+async def _run_sub_request(sub: BatchSubRequest, sem: asyncio.Semaphore) -> bytes:
+    route = _batchable_routes().get(sub.path)
+    if route is None:
+        return _batch_line(sub.id, 404, _dumps({"detail": f"Unknown path {sub.path}"}))
+
+    query = QueryParams([
+        (k, str(v).lower() if isinstance(v, bool) else str(v))
+        for k, v in sub.params.items()
+        if v is not None
+    ])
+    values, errors = request_params_to_args(route.dependant.query_params, query)
+    if errors:
+        detail = [{"loc": list(e.get("loc", ())), "msg": e.get("msg", "")} for e in errors]
+        return _batch_line(sub.id, 422, _dumps({"detail": detail}))
+
+    # Each sub-request costs the client a token, same as sending it on its own
+    try:
+        _admission.check_rate(_client_ctx.get())
+    except _Shed as e:
+        detail = {"detail": "Client rate limit exceeded", "retryAfter": max(1, math.ceil(e.retry_after))}
+        return _batch_line(sub.id, 429, _dumps(detail))
+
+    # Runs in its own task, so the projection applies to this sub-request only
+    if fields := query.get("fields"):
+        _fields_ctx.set(_compile_fields(fields))
+    if country := query.get("countryCode"):
+        if not _COUNTRY_PATTERN.match(country):
+            return _batch_line(sub.id, 422, _dumps({"detail": "countryCode must be a two-letter ISO country code"}))
+        _country_ctx.set(country.upper())
+
+    try:
+        async with sem:
+            result = await route.endpoint(**values)
+    except HTTPException as e:
+        return _batch_line(sub.id, e.status_code, _dumps({"detail": e.detail}))
+    except Exception:
+        logger.exception("Batch sub-request %s %s failed", sub.id, sub.path)
+        return _batch_line(sub.id, 500, _dumps({"detail": "Internal error"}))
+
+    if isinstance(result, Response):
+        return _batch_line(sub.id, result.status_code, result.body)
+    tree = _fields_ctx.get()
+    return _batch_line(sub.id, 200, _dumps(_project(result, tree) if tree else result))
+
+
+@app.post("/batch")
+async def batch(payload: BatchRequest):
+    """Run several GET routes in-process under one credential and stream NDJSON results as they finish.
+
+    Each line is {"id": <sub-request id>, "status": <http status>, "body": <route response>}.
+    """
+    subs = payload.requests
+    if not subs:
+        raise HTTPException(status_code=400, detail="Provide at least one request")
+    if len(subs) > BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_REQUESTS} requests per batch")
+    if len({sub.id for sub in subs}) != len(subs):
+        raise HTTPException(status_code=400, detail="Request ids must be unique")
+
+    # One credential (and so one token) for the whole batch; tasks inherit the pin
+    pin = _pinned_cred.set(_pick_credential())
+    try:
+        sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+        tasks = [asyncio.create_task(_run_sub_request(sub, sem)) for sub in subs]
+    finally:
+        _pinned_cred.reset(pin)
+
+    async def stream():
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# Launcher settings for `python main.py`
+SERVER = os.getenv("SERVER", "uvicorn").lower()
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WORKERS = int(os.getenv("WORKERS", "1"))
+BACKLOG = int(os.getenv("BACKLOG", "2048"))
+KEEPALIVE = float(os.getenv("KEEPALIVE", "5"))
+# Seconds in-flight requests get to finish after SIGTERM
+GRACEFUL_TIMEOUT = float(os.getenv("GRACEFUL_TIMEOUT", "30"))
+TLS_CERTFILE = os.getenv("TLS_CERTFILE")
+TLS_KEYFILE = os.getenv("TLS_KEYFILE")
+# Generate a localhost certificate for testing HTTP/2 over TLS and HTTP/3 locally
+TLS_SELF_SIGNED = os.getenv("TLS_SELF_SIGNED", "").lower() in ("1", "true", "yes")
+HTTP3 = os.getenv("HTTP3", "").lower() in ("1", "true", "yes")
+
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+def _self_signed_cert(directory: Path) -> Tuple[str, str]:
+    """Create (once) a short-lived localhost certificate for local H2/H3 testing."""
+    import datetime
+    import ipaddress
+
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    certfile, keyfile = directory / "localhost.pem", directory / "localhost-key.pem"
+    if certfile.exists() and keyfile.exists():
+        return str(certfile), str(keyfile)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=30))
+        .add_extension(
+            x509.SubjectAlternativeName([
+                x509.DNSName("localhost"),
+                x509.IPAddress(ipaddress.ip_address("127.0.0.1")),
+                x509.IPAddress(ipaddress.ip_address("::1")),
+            ]),
+            critical=False,
+        )
+        .sign(key, hashes.SHA256())
+    )
+    keyfile.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ))
+    os.chmod(keyfile, 0o600)
+    certfile.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    return str(certfile), str(keyfile)
+
+
+def _tls_files() -> Tuple[Optional[str], Optional[str]]:
+    if TLS_CERTFILE and TLS_KEYFILE:
+        return TLS_CERTFILE, TLS_KEYFILE
+    if TLS_SELF_SIGNED:
+        return _self_signed_cert(Path(".certs"))
+    return None, None
+
+
+def serve() -> None:
+    """Run the API under uvicorn (uvloop + httptools, multi-worker) or Hypercorn (HTTP/2, HTTP/3)."""
+    certfile, keyfile = _tls_files()
+
+    if SERVER == "hypercorn":
+        from hypercorn.config import Config
+        from hypercorn.run import run as hypercorn_run
+
+        config = Config()
+        config.application_path = "main:app"
+        config.bind = [f"{HOST}:{PORT}"]
+        config.workers = WORKERS
+        config.backlog = BACKLOG
+        config.keep_alive_timeout = KEEPALIVE
+        config.graceful_timeout = GRACEFUL_TIMEOUT
+        config.worker_class = "uvloop" if _has_module("uvloop") else "asyncio"
+        if certfile:
+            config.certfile, config.keyfile = certfile, keyfile
+            if HTTP3:
+                # QUIC listens on the same port over UDP; Alt-Svc advertises it to H1/H2 clients
+                config.quic_bind = [f"{HOST}:{PORT}"]
+        elif HTTP3:
+            logger.warning("HTTP3 needs TLS; set TLS_CERTFILE/TLS_KEYFILE or TLS_SELF_SIGNED=1")
+        # Hypercorn's runner handles SIGTERM/SIGINT with a graceful drain
+        hypercorn_run(config)
+        return
+
+    if SERVER != "uvicorn":
+        raise SystemExit(f"Unknown SERVER {SERVER!r}; use uvicorn or hypercorn")
+    if HTTP3:
+        logger.warning("HTTP3 is only available with SERVER=hypercorn")
+
+    # uvicorn drains in-flight requests on SIGTERM for up to timeout_graceful_shutdown
+    uvicorn.run(
+        "main:app",
+        host=HOST,
+        port=PORT,
+        workers=WORKERS,
+        backlog=BACKLOG,
+        timeout_keep_alive=int(KEEPALIVE),
+        timeout_graceful_shutdown=int(GRACEFUL_TIMEOUT),
+        loop="uvloop" if _has_module("uvloop") else "asyncio",
+        http="httptools" if _has_module("httptools") else "h11",
+        ssl_certfile=certfile,
+        ssl_keyfile=keyfile,
+    )
+
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    serve()
@@ -1,15 +1,28 @@
+import argparse
 import asyncio
 import json
 import os
 import random
+import sys
+import tempfile
+import time
 import webbrowser
 from pathlib import Path
 
 import httpx
 import rich
+from rich.table import Table
 
 TOKEN_FILE = Path(os.getenv("TOKEN_FILE", Path(__file__).resolve().parent.parent / "token.json"))
 
+TOKEN_URL = "https://auth.tidal.com/v1/oauth2/token"
+DEVICE_AUTH_URL = "https://auth.tidal.com/v1/oauth2/device_authorization"
+SCOPE = "r_usr+w_usr+w_sub"
+
+# Concurrent client ID probes / token refreshes
+PROBE_CONCURRENCY = 8
+VALIDATE_CONCURRENCY = 16
+
 
 class Hifi:
     def __init__(self, client_id, scope, url, client_secret):
@@ -29,17 +42,14 @@ class Auth(Hifi):
         super().__init__(client_id, scope, url, client_secret)
         self.response = None
 
-    async def get_auth_response(self):
+    async def get_auth_response(self, client):
         data = {"client_id": self.client_id, "scope": self.scope}
         headers = {
             "User-Agent": "Mozilla/5.0 (Linux; Android 8.0.0; SM-G965F Build/R16NW) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/65.0.3325.109 Mobile Safari/537.36"
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(self.url, data=data, headers=headers)
-            # We handle status codes in the main loop now
-
-        self.response = response
+        # Status codes are handled by the caller
+        self.response = await client.post(self.url, data=data, headers=headers)
 
     def __str__(self):
         return str(self.response)
@@ -55,146 +65,287 @@ def load_tokens():
     return []
 
 
+def write_tokens(tokens):
+    """Replace token.json atomically so readers never see a half-written file."""
+    fd, tmp_path = tempfile.mkstemp(dir=TOKEN_FILE.parent, prefix=".token.", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(tokens, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, TOKEN_FILE)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
 def save_token_entry(entry):
     tokens = load_tokens()
     tokens = [t for t in tokens if not (
         t.get("client_ID") == entry["client_ID"] and t.get("refresh_token") == entry["refresh_token"]
     )]
     tokens.append(entry)
-    with open(TOKEN_FILE, "w") as f:
-        json.dump(tokens, f, indent=4)
-
-
-async def poll_for_authorization(url, data, auth):
-    async with httpx.AsyncClient() as client:
-        while True:
-            response = await client.post(url, data=data, auth=auth)
-            if response.status_code == 200:
-                return response.json()
-            await asyncio.sleep(5)
-
-
-async def fetch_credentials():
-    url = "https://api.github.com/gists/48d01f5a24b4b7b37f19443977c22cd6"
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        gist_data = resp.json()
-        
-        content_str = gist_data["files"]["tidal-api-key.json"]["content"]
-        keys_data = json.loads(content_str)
-        
-        hifi_creds = [
-            ("fX2JxdmntZWK0ixT", "1Nn9AfDAjxrgJFJbKNWLeAyKGVGmINuXPPLHVXAvxAg=")
-        ]
-        other_creds = []
-        
-        for key_entry in keys_data["keys"]:
-            if key_entry.get("valid") == "True":
-                cred = (key_entry["clientId"], key_entry["clientSecret"])
-                if "hifi" in key_entry.get("formats", "").lower():
-                    hifi_creds.append(cred)
-                else:
-                    other_creds.append(cred)
-        
-        if not hifi_creds and not other_creds:
-            raise Exception("No valid Tidal credentials found in Gist")
-        return hifi_creds, other_creds
-
-
-async def main():
-    hifi_creds, other_creds = await fetch_credentials()
-    random.shuffle(hifi_creds)
-    random.shuffle(other_creds)
-    all_creds = hifi_creds + other_creds
-
-    async def run_link_flow():
-        authrize = None
-        for client_id, client_secret in all_creds:
+    write_tokens(tokens)
+
+
+async def poll_for_authorization(client, url, data, auth, interval=5, expires_in=300):
+    """Poll the device-code token endpoint at the server-specified interval (RFC 8628)."""
+    deadline = time.monotonic() + expires_in
+    while time.monotonic() < deadline:
+        await asyncio.sleep(interval)
+        response = await client.post(url, data=data, auth=auth)
+        if response.status_code == 200:
+            return response.json()
+
+        try:
+            error = response.json().get("error")
+        except ValueError:
+            error = None
+        if error == "slow_down":
+            interval += 5
+        elif error in ("expired_token", "access_denied"):
+            rich.print(f"[red]Authorization failed: {error}[/red]")
+            return None
+    rich.print("[red]Device code expired before authorization.[/red]")
+    return None
+
+
+async def probe_client_id(client, client_id, client_secret):
+    authrize = Auth(
+        client_id=client_id,
+        scope=SCOPE,
+        url=DEVICE_AUTH_URL,
+        client_secret=client_secret,
+    )
+    await authrize.get_auth_response(client)
+    if authrize.response.status_code != 200:
+        raise RuntimeError(f"status {authrize.response.status_code}")
+    return authrize
+
+
+async def probe_first_working(client, creds):
+    """Probe client IDs concurrently and return the first that issues a device code."""
+    sem = asyncio.Semaphore(PROBE_CONCURRENCY)
+
+    async def probe(client_id, client_secret):
+        async with sem:
             rich.print(f"Trying Client ID: {client_id}")
-            authrize = Auth(
-                client_id=client_id,
-                scope="r_usr+w_usr+w_sub",
-                url="https://auth.tidal.com/v1/oauth2/device_authorization",
-                client_secret=client_secret,
-            )
+            return await probe_client_id(client, client_id, client_secret)
 
+    tasks = {asyncio.create_task(probe(cid, secret)): cid for cid, secret in creds}
+    try:
+        for next_done in asyncio.as_completed(tasks):
             try:
-                await authrize.get_auth_response()
-                if authrize.response.status_code == 200:
-                    break
-                elif authrize.response.status_code == 401:
-                    rich.print(f"[yellow]Client ID {client_id} failed with 401. Trying next...[/yellow]")
-                    continue
-                else:
-                    rich.print(f"[red]Error {authrize.response.status_code}. Trying next...[/red]")
-                    continue
+                return await next_done
             except Exception as e:
-                rich.print(f"[red]Exception: {e}. Trying next...[/red]")
-                continue
-        else:
-            rich.print("[red]All tokens failed.[/red]")
-            return False
-
-        res = authrize.response.json()
-
-        verifyurl = res["verificationUriComplete"]
-        dcode = res["deviceCode"]
+                rich.print(f"[yellow]Client ID probe failed ({e}). Waiting on the others...[/yellow]")
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
 
-        rich.print(verifyurl)
-        rich.print(dcode)
 
-        HI_RES = authrize.Quality(quality="True")
-        rich.print(HI_RES)
-
-        webbrowser.open(verifyurl)
-
-        url2 = "https://auth.tidal.com/v1/oauth2/token"
-
-        data2 = {
-            "client_id": authrize.client_id,
-            "scope": authrize.scope,
-            "device_code": dcode,
-            "grant_type": "urn:ietf:params:oauth:grant-type:device_code",
-        }
-
-        basic = (authrize.client_id, authrize.client_secret)
-
-        auth_response = await poll_for_authorization(url2, data2, basic)
+async def fetch_credentials(client):
+    url = "https://api.github.com/gists/48d01f5a24b4b7b37f19443977c22cd6"
+    resp = await client.get(url)
+    resp.raise_for_status()
+    gist_data = resp.json()
+
+    content_str = gist_data["files"]["tidal-api-key.json"]["content"]
+    keys_data = json.loads(content_str)
+
+    hifi_creds = [
+        ("fX2JxdmntZWK0ixT", "1Nn9AfDAjxrgJFJbKNWLeAyKGVGmINuXPPLHVXAvxAg=")
+    ]
+    other_creds = []
+
+    for key_entry in keys_data["keys"]:
+        if key_entry.get("valid") == "True":
+            cred = (key_entry["clientId"], key_entry["clientSecret"])
+            if "hifi" in key_entry.get("formats", "").lower():
+                hifi_creds.append(cred)
+            else:
+                other_creds.append(cred)
+
+    if not hifi_creds and not other_creds:
+        raise Exception("No valid Tidal credentials found in Gist")
+    return hifi_creds, other_creds
+
+
+async def run_link_flow(client, hifi_creds, other_creds):
+    # HiFi-capable client IDs are preferred; the rest are only probed if none of them work
+    authrize = await probe_first_working(client, hifi_creds)
+    if authrize is None and other_creds:
+        authrize = await probe_first_working(client, other_creds)
+    if authrize is None:
+        rich.print("[red]All tokens failed.[/red]")
+        return False
+
+    rich.print(f"Using Client ID: {authrize.client_id}")
+    res = authrize.response.json()
+
+    verifyurl = res["verificationUriComplete"]
+    dcode = res["deviceCode"]
+
+    rich.print(verifyurl)
+    rich.print(dcode)
+
+    HI_RES = authrize.Quality(quality="True")
+    rich.print(HI_RES)
+
+    webbrowser.open(verifyurl)
+
+    data2 = {
+        "client_id": authrize.client_id,
+        "scope": authrize.scope,
+        "device_code": dcode,
+        "grant_type": "urn:ietf:params:oauth:grant-type:device_code",
+    }
+
+    basic = (authrize.client_id, authrize.client_secret)
+
+    auth_response = await poll_for_authorization(
+        client,
+        TOKEN_URL,
+        data2,
+        basic,
+        interval=res.get("interval", 5),
+        expires_in=res.get("expiresIn", 300),
+    )
+    if auth_response is None:
+        return False
+
+    access_token = auth_response["access_token"]
+    refresh_token = auth_response["refresh_token"]
+    user_id = auth_response["user"]["userId"]
+    accs = {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "userID": user_id,
+        # Account region, used by the proxy to route requests per countryCode
+        "countryCode": auth_response["user"].get("countryCode"),
+        "client_ID": authrize.client_id,
+        "client_secret": authrize.client_secret,
+    }
+    save_token_entry(accs)
+    rich.print(accs)
+    acs_tok = access_token
+
+    url3 = f"https://api.tidal.com/v1/tracks/286266926/playbackinfopostpaywall?countryCode=en_US&audioquality={HI_RES}&playbackmode=STREAM&assetpresentation=FULL"
+
+    headers = {"authorization": f"Bearer {acs_tok}"}
+
+    res3 = await client.get(url3, headers=headers)
+
+    rich.print(res3.json())
+    print("TOKEN IS VALID")
+    return True
+
+
+async def check_token_entry(client, entry):
+    """Refresh one token.json entry. Returns (status, latency_ms, detail).
+
+    status is "ok", "dead" (the refresh token was rejected) or "error" (transient; kept on prune).
+    """
+    started = time.monotonic()
+    try:
+        response = await client.post(
+            TOKEN_URL,
+            data={
+                "client_id": entry.get("client_ID"),
+                "refresh_token": entry.get("refresh_token"),
+                "grant_type": "refresh_token",
+                "scope": SCOPE,
+            },
+            auth=(entry.get("client_ID"), entry.get("client_secret")),
+        )
+    except httpx.HTTPError as e:
+        return "error", (time.monotonic() - started) * 1000, str(e) or type(e).__name__
+    latency = (time.monotonic() - started) * 1000
+
+    if response.status_code == 200:
+        return "ok", latency, f"expires in {response.json().get('expires_in', '?')}s"
+    if response.status_code in (400, 401):
+        try:
+            detail = response.json().get("error", response.status_code)
+        except ValueError:
+            detail = response.status_code
+        return "dead", latency, str(detail)
+    return "error", latency, f"HTTP {response.status_code}"
+
+
+async def validate_tokens(client, prune=False):
+    tokens = load_tokens()
+    if not tokens:
+        rich.print(f"[yellow]No tokens in {TOKEN_FILE}[/yellow]")
+        return True
 
-        access_token = auth_response["access_token"]
-        refresh_token = auth_response["refresh_token"]
-        user_id = auth_response["user"]["userId"]
-        accs = {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "userID": user_id,
-            "client_ID": client_id,
-            "client_secret": client_secret,
+    sem = asyncio.Semaphore(VALIDATE_CONCURRENCY)
+
+    async def check(entry):
+        async with sem:
+            return await check_token_entry(client, entry)
+
+    results = await asyncio.gather(*(check(entry) for entry in tokens))
+
+    table = Table(title=f"{TOKEN_FILE}")
+    for column in ("#", "User", "Client ID", "Status", "Latency", "Detail"):
+        table.add_column(column)
+    colors = {"ok": "green", "dead": "red", "error": "yellow"}
+    for i, (entry, (status, latency, detail)) in enumerate(zip(tokens, results)):
+        table.add_row(
+            str(i),
+            str(entry.get("userID")),
+            str(entry.get("client_ID")),
+            f"[{colors[status]}]{status}[/{colors[status]}]",
+            f"{latency:.0f} ms",
+            detail,
+        )
+    rich.print(table)
+
+    dead = sum(1 for status, _, _ in results if status == "dead")
+    if prune and dead:
+        # Re-read right before writing so entries added meanwhile aren't lost
+        dead_keys = {
+            (entry.get("client_ID"), entry.get("refresh_token"))
+            for entry, (status, _, _) in zip(tokens, results)
+            if status == "dead"
         }
-        save_token_entry(accs)
-        rich.print(accs)
-        acs_tok = access_token
-
-        url3 = f"https://api.tidal.com/v1/tracks/286266926/playbackinfopostpaywall?countryCode=en_US&audioquality={HI_RES}&playbackmode=STREAM&assetpresentation=FULL"
-
-        headers = {"authorization": f"Bearer {acs_tok}"}
+        kept = [t for t in load_tokens() if (t.get("client_ID"), t.get("refresh_token")) not in dead_keys]
+        write_tokens(kept)
+        rich.print(f"[green]Pruned {dead} dead entries; {len(kept)} remain.[/green]")
+        return True
+    if dead:
+        rich.print(f"[yellow]{dead} dead entries. Re-run with --prune to remove them.[/yellow]")
+    return dead == 0
 
-        async with httpx.AsyncClient() as client:
-            res3 = await client.get(url3, headers=headers)
 
-        rich.print(res3.json())
-        print("TOKEN IS VALID")
-        return True
+async def main():
+    parser = argparse.ArgumentParser(description="Manage Tidal tokens in token.json.")
+    subcommands = parser.add_subparsers(dest="command")
+    subcommands.add_parser("link", help="authorize a new account (default)")
+    validate = subcommands.add_parser("validate", help="refresh every entry in parallel and report status")
+    validate.add_argument("--prune", action="store_true", help="remove entries whose refresh token was rejected")
+    args = parser.parse_args()
+
+    # One pooled client for every probe, poll and refresh
+    async with httpx.AsyncClient(timeout=httpx.Timeout(15.0)) as client:
+        if args.command == "validate":
+            return await validate_tokens(client, prune=args.prune)
+
+        hifi_creds, other_creds = await fetch_credentials(client)
+        random.shuffle(hifi_creds)
+        random.shuffle(other_creds)
 
-    while True:
-        success = await run_link_flow()
-        if not success:
-            break
-        again = input("Add another token? (y/N): ").strip().lower()
-        if again not in ("y", "yes"):
-            break
+        while True:
+            success = await run_link_flow(client, hifi_creds, other_creds)
+            if not success:
+                return False
+            again = input("Add another token? (y/N): ").strip().lower()
+            if again not in ("y", "yes"):
+                return True
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # False when `validate` leaves dead entries behind or linking an account failed
+    sys.exit(0 if asyncio.run(main()) else 1)